@@ -0,0 +1,15 @@
+"""Helpers shared by the scripts that launch other scripts as subprocesses."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+
+def pick_python() -> str:
+    """Prefer the running interpreter; fall back to the repo .venv outside a venv."""
+    if sys.prefix != sys.base_prefix:
+        return sys.executable
+    venv_python = Path(__file__).resolve().parents[1] / ".venv" / "bin" / "python"
+    if venv_python.exists():
+        return str(venv_python)
+    return sys.executable
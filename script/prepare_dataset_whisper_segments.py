@@ -199,6 +199,16 @@ def main() -> int:
         default=None,
         help="Optional metadata output path (default: <out_dataset>/metadata_2col.csv)",
     )
+    parser.add_argument(
+        "--wavs-out-dir",
+        default=None,
+        help="Optional directory for output clips (default: <out_dataset>/wavs)",
+    )
+    parser.add_argument(
+        "--wav-prefix",
+        default="",
+        help="Optional prefix for output clip filenames (e.g. shard_0_)",
+    )
     parser.add_argument("--whisper-model", default="medium", help="Whisper model name (tiny/base/small/medium/large)")
     parser.add_argument(
         "--device",
@@ -232,6 +242,7 @@ def main() -> int:
     dataset_dir = Path(args.dataset).expanduser().resolve()
     out_dir = Path(args.out_dataset).expanduser().resolve() if args.out_dataset else Path(f"{dataset_dir}_prepared")
     metadata_out = Path(args.metadata_out).expanduser().resolve() if args.metadata_out else out_dir / "metadata_2col.csv"
+    wavs_out_dir = Path(args.wavs_out_dir).expanduser().resolve() if args.wavs_out_dir else out_dir / "wavs"
 
     if out_dir.exists():
         if args.overwrite:
@@ -240,7 +251,7 @@ def main() -> int:
             raise SystemExit(f"Output dir exists (use --overwrite): {out_dir}")
 
     out_dir.mkdir(parents=True, exist_ok=True)
-    (out_dir / "wavs").mkdir(parents=True, exist_ok=True)
+    wavs_out_dir.mkdir(parents=True, exist_ok=True)
 
     base_config = _load_config(dataset_dir)
     _write_config(out_dir, base_config, sample_rate=args.sample_rate)
@@ -296,8 +307,8 @@ def main() -> int:
             if len(text) < args.min_text_chars or len(text) > args.max_text_chars:
                 continue
 
-            out_name = f"{wav_path.stem}_{seg_counter:04d}.wav"
-            out_wav = out_dir / "wavs" / out_name
+            out_name = f"{args.wav_prefix}{wav_path.stem}_{seg_counter:04d}.wav"
+            out_wav = wavs_out_dir / out_name
 
             _ffmpeg_cut_resample(
                 src_wav=wav_path,
@@ -2,7 +2,8 @@
 """Multi-GPU launcher for prepare_dataset_whisper_segments.py.
 
 Splits input WAVs into shards and runs multiple workers in parallel (typically one per GPU).
-Each worker writes its own shard dataset; then this launcher merges shards into a single
+Each worker writes clips directly into the final wavs/ dir (with a per-shard filename
+prefix) and its own shard metadata; then this launcher merges the metadata into a single
 Piper-ready output dataset.
 
 Local-only: uses Whisper + ffmpeg, no paid APIs.
@@ -16,7 +17,11 @@ import os
 import shutil
 import subprocess
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
+
+from launch_utils import pick_python
+
+_METADATA_WRITE_CHUNK = 65536
 
 
 def _run(cmd: list[str], *, env: dict[str, str] | None = None) -> None:
@@ -56,10 +61,49 @@ def _write_wavs_file(path: Path, wavs: Iterable[Path]) -> None:
             f.write(str(w) + "\n")
 
 
-def _merge_shards(final_dir: Path, shard_dirs: list[Path]) -> None:
-    (final_dir / "wavs").mkdir(parents=True, exist_ok=True)
+def _resolve_gpu_uuids(gpus: list[str]) -> list[Optional[str]]:
+    """Map GPU indices to NVML device UUIDs.
+
+    UUIDs are stable across CUDA_DEVICE_ORDER and MIG partitioning, unlike raw
+    indices. Returns None entries when NVML is unavailable (e.g. ROCm hosts)
+    or cannot resolve a particular index.
+    """
+    try:
+        import pynvml
+    except ImportError:
+        return [None] * len(gpus)
+
+    try:
+        pynvml.nvmlInit()
+    except pynvml.NVMLError:
+        return [None] * len(gpus)
+
+    uuids: list[Optional[str]] = []
+    try:
+        for gpu in gpus:
+            if not gpu.isdigit():
+                # Already a UUID (or MIG id); pass through unchanged.
+                uuids.append(gpu)
+                continue
+            try:
+                handle = pynvml.nvmlDeviceGetHandleByIndex(int(gpu))
+                uuid = pynvml.nvmlDeviceGetUUID(handle)
+            except pynvml.NVMLError:
+                # Index not visible to NVML; fall back to the raw index.
+                uuids.append(None)
+                continue
+            if isinstance(uuid, bytes):
+                uuid = uuid.decode()
+            uuids.append(uuid)
+    finally:
+        pynvml.nvmlShutdown()
+
+    return uuids
 
-    seen = set()
+
+def _merge_shards(final_dir: Path, shard_dirs: list[Path]) -> None:
+    # Workers write clips straight into final_dir/wavs (with a per-shard
+    # filename prefix), so only metadata needs merging here.
     rows: list[str] = []
 
     for shard in shard_dirs:
@@ -67,18 +111,6 @@ def _merge_shards(final_dir: Path, shard_dirs: list[Path]) -> None:
         if not meta.is_file():
             continue
 
-        # Move wavs
-        wavs_dir = shard / "wavs"
-        if wavs_dir.is_dir():
-            for wav in wavs_dir.iterdir():
-                if wav.suffix.lower() != ".wav":
-                    continue
-                name = wav.name
-                if name in seen:
-                    raise RuntimeError(f"Name collision when merging shards: {name}")
-                seen.add(name)
-                shutil.move(str(wav), str(final_dir / "wavs" / name))
-
         # Collect metadata lines
         with meta.open("r", encoding="utf-8") as f:
             for line in f:
@@ -87,11 +119,20 @@ def _merge_shards(final_dir: Path, shard_dirs: list[Path]) -> None:
                     continue
                 rows.append(line)
 
+    wav_count = sum(1 for p in (final_dir / "wavs").iterdir() if p.suffix.lower() == ".wav")
+    if wav_count != len(rows):
+        raise RuntimeError(
+            f"Shard output mismatch: {wav_count} wavs in {final_dir / 'wavs'} "
+            f"but {len(rows)} metadata rows"
+        )
+
     # Write merged metadata
     rows.sort()  # deterministic
-    with (final_dir / "metadata_2col.csv").open("w", encoding="utf-8") as f:
-        for line in rows:
-            f.write(line + "\n")
+    with (final_dir / "metadata_2col.csv").open("wb", buffering=1 << 20) as f:
+        # Encode in large chunks instead of one text-mode write per line.
+        for start in range(0, len(rows), _METADATA_WRITE_CHUNK):
+            chunk = rows[start : start + _METADATA_WRITE_CHUNK]
+            f.write(("\n".join(chunk) + "\n").encode("utf-8"))
 
 
 def main() -> int:
@@ -137,11 +178,16 @@ def main() -> int:
     splits_dir = work_dir / "splits"
     splits_dir.mkdir(parents=True, exist_ok=True)
 
+    final_wavs_dir = final_dir / "wavs"
+    final_wavs_dir.mkdir(parents=True, exist_ok=True)
+
+    gpu_uuids = _resolve_gpu_uuids(gpus)
+
     wavs = _iter_wavs(dataset_dir)
     shards = _chunk_round_robin(wavs, len(gpus))
 
     script_path = Path(__file__).resolve().parent / "prepare_dataset_whisper_segments.py"
-    python = Path(__file__).resolve().parents[1] / ".venv" / "bin" / "python"
+    python = pick_python()
 
     shard_dirs: list[Path] = []
     procs: list[subprocess.Popen] = []
@@ -159,7 +205,7 @@ def main() -> int:
             shutil.rmtree(shard_dir)
 
         cmd = [
-            str(python),
+            python,
             str(script_path),
             "--dataset",
             str(dataset_dir),
@@ -169,6 +215,10 @@ def main() -> int:
             str(wavs_file),
             "--metadata-out",
             str(shard_dir / "metadata_2col.csv"),
+            "--wavs-out-dir",
+            str(final_wavs_dir),
+            "--wav-prefix",
+            f"shard_{idx}_",
             "--whisper-model",
             args.whisper_model,
             "--device",
@@ -189,7 +239,15 @@ def main() -> int:
         ]
 
         env = os.environ.copy()
-        env["CUDA_VISIBLE_DEVICES"] = gpu
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+        uuid = gpu_uuids[idx]
+        if uuid:
+            env["CUDA_VISIBLE_DEVICES"] = uuid
+        else:
+            # No NVML (e.g. ROCm): fall back to raw indices.
+            env["CUDA_VISIBLE_DEVICES"] = gpu
+            env["HIP_VISIBLE_DEVICES"] = gpu
+        print(f"worker {idx}: gpu={gpu} uuid={uuid or '(unavailable)'}", flush=True)
 
         log_path = splits_dir / f"worker_{idx}.log"
         log_f = open(log_path, "w", encoding="utf-8")
@@ -213,6 +271,7 @@ def main() -> int:
     with (final_dir / "PREPARE_INFO.txt").open("w", encoding="utf-8") as f:
         f.write(f"source_dataset={dataset_dir}\n")
         f.write(f"gpus={','.join(gpus)}\n")
+        f.write(f"gpu_uuids={','.join(u or '' for u in gpu_uuids)}\n")
         f.write(f"whisper_model={args.whisper_model}\n")
         f.write(f"language={args.language}\n")
         f.write(f"sample_rate={args.sample_rate}\n")
@@ -9,7 +9,6 @@ from __future__ import annotations
 import argparse
 import os
 import subprocess
-import sys
 import time
 from pathlib import Path
 from typing import Optional
@@ -19,13 +18,7 @@ from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
 
-
-def _pick_python() -> str:
-    repo_root = Path(__file__).resolve().parents[1]
-    venv_python = repo_root / ".venv" / "bin" / "python"
-    if venv_python.exists():
-        return str(venv_python)
-    return sys.executable
+from launch_utils import pick_python
 
 
 def _read_last_line(path: Path) -> str:
@@ -39,11 +32,36 @@ def _read_last_line(path: Path) -> str:
         return "(read error)"
 
 
-def _file_size(path: Path) -> int:
+def _scan_shard_logs(
+    shard_reports_dir: Path,
+    cache: dict[str, tuple[int, int, str]],
+) -> bool:
+    """Refresh cached (mtime_ns, size, last_line) per shard log.
+
+    Shard dirs are listed with a single os.scandir pass and each log is
+    stat'ed once; the log is only re-read when its mtime/size changed.
+    Returns True if any entry changed.
+    """
+    changed = False
     try:
-        return path.stat().st_size
-    except Exception:
-        return 0
+        with os.scandir(shard_reports_dir) as it:
+            entries = {e.name: e for e in it if e.is_dir()}
+    except FileNotFoundError:
+        entries = {}
+
+    for name, entry in entries.items():
+        log_path = Path(entry.path) / "validator_whisper.log"
+        try:
+            st = os.stat(log_path)
+        except OSError:
+            continue
+        prev = cache.get(name)
+        if prev is not None and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
+            continue
+        cache[name] = (st.st_mtime_ns, st.st_size, _read_last_line(log_path))
+        changed = True
+
+    return changed
 
 
 def _gpu_status() -> str:
@@ -67,6 +85,7 @@ def _render_table(
     shard_count: int,
     start_time: float,
     pid: Optional[int],
+    log_cache: dict[str, tuple[int, int, str]],
 ) -> Table:
     table = Table(title="Whisper Validation (Rich)")
     table.add_column("Item")
@@ -80,9 +99,7 @@ def _render_table(
     table.add_row("GPU", _gpu_status())
 
     for i in range(shard_count):
-        log_path = report_dir / "shard_reports" / f"shard_{i}" / "validator_whisper.log"
-        size = _file_size(log_path)
-        last_line = _read_last_line(log_path)
+        _mtime_ns, size, last_line = log_cache.get(f"shard_{i}", (0, 0, "(no log yet)"))
         table.add_row(f"shard_{i} log size", f"{size} bytes")
         table.add_row(f"shard_{i} last", last_line)
 
@@ -131,8 +148,8 @@ def main() -> int:
     )
     parser.add_argument(
         "--whisper-compute-type",
-        default="float16",
-        help="Compute type for faster-whisper (float16/int8/int8_float16).",
+        default="auto",
+        help="Compute type for faster-whisper (auto/bfloat16/float16/int8/int8_float16).",
     )
     parser.add_argument(
         "--whisper-beam-size",
@@ -177,6 +194,12 @@ def main() -> int:
         default=2.0,
         help="Rich UI refresh interval in seconds.",
     )
+    parser.add_argument(
+        "--min-refresh-gap-ms",
+        type=int,
+        default=0,
+        help="Minimum gap between shard log scans in ms; the UI still redraws every refresh (0 = scan every refresh).",
+    )
     args = parser.parse_args()
 
     dataset = Path(args.dataset).expanduser().resolve()
@@ -193,7 +216,7 @@ def main() -> int:
     runner_log = report_dir / "runner.log"
 
     cmd = [
-        _pick_python(),
+        pick_python(),
         str(Path(__file__).resolve().parent / "validate_dataset_whisper_sharded.py"),
         "--dataset",
         str(dataset),
@@ -230,6 +253,7 @@ def main() -> int:
 
     env = os.environ.copy()
     env["PYTHONUNBUFFERED"] = "1"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
 
     with runner_log.open("w", encoding="utf-8") as log_f:
         proc = subprocess.Popen(cmd, stdout=log_f, stderr=subprocess.STDOUT, env=env)
@@ -237,17 +261,27 @@ def main() -> int:
     console = Console()
     start_time = time.time()
 
+    log_cache: dict[str, tuple[int, int, str]] = {}
+    min_gap = max(0, args.min_refresh_gap_ms) / 1000.0
+    last_scan = 0.0
+
     with Live(console=console, refresh_per_second=max(1, int(1 / args.refresh_seconds))):
         while True:
+            finished = proc.poll() is not None
+            now = time.time()
+            if finished or (now - last_scan) >= min_gap:
+                _scan_shard_logs(report_dir / "shard_reports", log_cache)
+                last_scan = now
             table = _render_table(
                 report_dir=report_dir,
                 shard_count=shard_count,
                 start_time=start_time,
                 pid=proc.pid,
+                log_cache=log_cache,
             )
             console.clear()
             console.print(Panel(table))
-            if proc.poll() is not None:
+            if finished:
                 break
             time.sleep(args.refresh_seconds)
 
@@ -25,144 +25,68 @@ import argparse
 import json
 import re
 import sys
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+# Hot chunking loop lives in an importable, mypyc-compatible module next to
+# this script; a compiled grouping*.so there is picked up automatically.
+from grouping import smart_grouping
 
-_WS_RE = re.compile(r"\s+")
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 
-def _split_long_sentence(text: str, max_len: int) -> list[str]:
-    """Split an overlong sentence into smaller parts.
+def _json_loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
-    Strategy: prefer splitting on strong intra-sentence separators near the
-    target length, falling back to whitespace.
-    """
 
-    text = text.strip()
-    if not text:
-        return []
-    if len(text) <= max_len:
-        return [text]
-
-    parts: list[str] = []
-    remaining = text
-
-    # Prefer these break characters (ordered)
-    break_chars = [";", ":", ",", "—"]
-
-    while remaining and len(remaining) > max_len:
-        window = remaining[: max_len + 1]
-
-        cut = -1
-        # Try to find a separator between 70%..100% of max_len
-        start_search = int(max_len * 0.70)
-        for ch in break_chars:
-            idx = window.rfind(ch, start_search)
-            if idx != -1:
-                cut = idx + 1  # keep punctuation
-                break
-
-        # Fallback: cut at last whitespace
-        if cut == -1:
-            idx = window.rfind(" ", start_search)
-            if idx != -1:
-                cut = idx
-            else:
-                cut = max_len
+def _json_dumps_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 JSON (non-ASCII kept as-is)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
 
-        head = remaining[:cut].strip()
-        if head:
-            parts.append(head)
-        remaining = remaining[cut:].strip()
+# Alternatives (by group): hyphen-as-dash, whitespace before punctuation,
+# other whitespace, Piper metadata separator.
+_CLEAN_RE = re.compile(r"(\s+-\s+(?![\s.,!?;:]))|(\s+(?=[.,!?;:]))|(\s+)|(\|)")
+_CLEAN_REPL = (None, " — ", "", " ", " ")
 
-    if remaining:
-        parts.append(remaining)
 
-    return parts
+def _clean_sub(match: re.Match[str]) -> str:
+    return _CLEAN_REPL[match.lastindex]  # type: ignore[index]
 
 
+@lru_cache(maxsize=65536)
 def clean_text(text: str) -> str:
-    """Basic normalization for text coming from manifests."""
-    # Collapse all whitespace/newlines
-    text = _WS_RE.sub(" ", text)
-    # Remove spaces before punctuation (common parsing/OCR artifact)
-    text = re.sub(r"\s+([.,!?;:])", r"\1", text)
-    # Normalize hyphen-as-dash: " - " -> " — "
-    text = re.sub(r"\s-\s", " — ", text)
-    # Remove separator used in Piper metadata
-    text = text.replace("|", " ")
-    return text.strip()
-
-
-def smart_grouping(*, sentences: list[str], max_len: int, min_len: int) -> list[str]:
-    """Group sentence strings into chunks to fit length constraints."""
-    # First, expand any single overlong sentences.
-    expanded: list[str] = []
-    for s in sentences:
-        s = s.strip()
-        if not s:
-            continue
-        expanded.extend(_split_long_sentence(s, max_len))
-
-    chunks: list[str] = []
-    current: list[str] = []
-    current_len = 0
-
-    for sent_text in expanded:
-        sent_text = sent_text.strip()
-        if not sent_text:
-            continue
-
-        sent_len = len(sent_text)
-
-        # If the next sentence fits, append
-        if current and (current_len + 1 + sent_len) <= max_len:
-            current.append(sent_text)
-            current_len += 1 + sent_len
-            continue
-
-        if not current and sent_len <= max_len:
-            current = [sent_text]
-            current_len = sent_len
-            continue
-
-        # If we are here: would exceed max_len OR sentence itself is too long.
-        # Close current chunk if present.
-        if current:
-            chunks.append(" ".join(current).strip())
-            current = []
-            current_len = 0
-
-        # Start new chunk with this sentence.
-        current = [sent_text]
-        current_len = sent_len
-
-    # Tail
-    if current:
-        last = " ".join(current).strip()
-        if len(last) < min_len and chunks:
-            prev = chunks.pop()
-            # allow slight overflow to avoid "orphans"
-            if len(prev) + 1 + len(last) <= (max_len + 50):
-                chunks.append((prev + " " + last).strip())
-            else:
-                chunks.append(prev)
-                chunks.append(last)
-        else:
-            chunks.append(last)
+    """Basic normalization for text coming from manifests.
+
+    Single regex pass equivalent to, in order: collapse whitespace/newlines,
+    remove spaces before punctuation, normalize " - " to " — " and replace the
+    Piper metadata separator "|" with a space.
+    """
+    return _CLEAN_RE.sub(_clean_sub, text).strip()
+
+
+@lru_cache(maxsize=100_000)
+def _sentenize_cached(text: str) -> tuple[str, ...]:
+    """razdel sentence segmentation, memoized for repeated manifest text."""
+    from razdel import sentenize  # type: ignore
 
-    # Final cleanup (ensure no empties)
-    chunks = [c for c in (c.strip() for c in chunks) if c]
-    return chunks
+    return tuple(s.text for s in sentenize(text))
 
 
-def _load_manifest_line(line: str) -> dict[str, Any] | None:
-    line = line.strip("\n")
+def _load_manifest_line(line: bytes) -> dict[str, Any] | None:
+    # Raw bytes go straight to the JSON parser (no text-mode decode).
     if not line.strip():
         return None
     try:
-        obj = json.loads(line)
+        obj = _json_loads(line)
     except Exception:
         return None
     if not isinstance(obj, dict):
@@ -177,9 +101,10 @@ def process_manifest(
     target_len: int,
     min_len: int,
     limit: int = 0,
+    print_samples: int = 0,
 ) -> int:
     try:
-        from razdel import sentenize  # type: ignore
+        import razdel  # type: ignore  # noqa: F401
     except Exception:
         print("ERROR: missing dependency 'razdel'. Install: pip install razdel", file=sys.stderr)
         return 2
@@ -189,13 +114,19 @@ def process_manifest(
         print(f"ERROR: input file not found: {input_file}", file=sys.stderr)
         return 2
 
-    output: list[dict[str, Any]] = []
+    output_file = output_file.expanduser().resolve()
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    samples: list[dict[str, Any]] = []
     processed = 0
     kept = 0
 
     seen_nonempty = 0
 
-    with input_file.open("r", encoding="utf-8") as f_in:
+    # Stream records to disk (one compact JSON object per line inside a
+    # top-level array) instead of materializing the whole output list.
+    with input_file.open("rb") as f_in, output_file.open("wb") as f_out:
+        f_out.write(b"[")
         for idx, line in enumerate(f_in, start=1):
             if line.strip():
                 seen_nonempty += 1
@@ -218,9 +149,14 @@ def process_manifest(
             if not cleaned:
                 continue
 
-            # razdel sentence segmentation
-            sents = [s.text for s in sentenize(cleaned)]
-            segments = smart_grouping(sentences=sents, max_len=target_len, min_len=min_len)
+            if len(cleaned) <= target_len and "  " not in cleaned:
+                # Fits in one chunk: grouping would just re-join razdel's
+                # sentences with single spaces, i.e. reproduce `cleaned`.
+                segments = [cleaned]
+            else:
+                # razdel sentence segmentation
+                sents = list(_sentenize_cached(cleaned))
+                segments = smart_grouping(sentences=sents, max_len=target_len, min_len=min_len)
             if not segments:
                 continue
 
@@ -236,25 +172,29 @@ def process_manifest(
                 "meta": record.get("meta"),
             }
 
-            output.append(
-                {
-                    "audio_path": audio_path,
-                    "sentences": segments,
-                    "original_full_text": cleaned,
-                    "manifest_meta": meta_keep,
-                }
-            )
+            entry = {
+                "audio_path": audio_path,
+                "sentences": segments,
+                "original_full_text": cleaned,
+                "manifest_meta": meta_keep,
+            }
+            f_out.write(b"\n" if kept == 0 else b",\n")
+            f_out.write(_json_dumps_bytes(entry))
+            if len(samples) < print_samples:
+                samples.append(entry)
             kept += 1
 
-    output_file = output_file.expanduser().resolve()
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(
-        json.dumps(output, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
-    )
+        f_out.write(b"\n]\n")
 
     print(f"OK: processed_lines={processed} kept_records={kept}")
     print(f"Wrote: {output_file}")
+
+    for i, entry in enumerate(samples):
+        print(f"\n--- sample {i+1} ---")
+        print(f"audio_path: {entry['audio_path']}")
+        for j, sent in enumerate(entry["sentences"][:10]):
+            print(f"  {j+1:02d}. {sent}")
+
     return 0
 
 
@@ -286,34 +226,14 @@ def main() -> int:
     print_samples = int(args.print_samples) if args.print_samples else 0
 
     # Run main processing
-    rc = process_manifest(
+    return process_manifest(
         input_file=args.input,
         output_file=out_path,
         target_len=args.target_length,
         min_len=args.min_length,
         limit=limit,
+        print_samples=print_samples,
     )
-    if rc != 0:
-        return rc
-
-    if limit or print_samples:
-        try:
-            data = json.loads(out_path.read_text(encoding="utf-8"))
-            if not isinstance(data, list):
-                return 0
-            if print_samples:
-                for i, entry in enumerate(data[:print_samples]):
-                    ap = entry.get("audio_path")
-                    sents = entry.get("sentences")
-                    print(f"\n--- sample {i+1} ---")
-                    print(f"audio_path: {ap}")
-                    if isinstance(sents, list):
-                        for j, s in enumerate(sents[:10]):
-                            print(f"  {j+1:02d}. {s}")
-        except Exception:
-            pass
-
-    return 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+"""Sentence chunking for the text splitter (Stage A).
+
+Pure, fully typed string/int code kept separate from the CLI so it can be
+compiled with mypyc for a faster chunking loop:
+
+    mypyc script/text_splitter/grouping.py
+
+Python imports the resulting extension module in preference to this file;
+without it, this pure-Python version is used.
+"""
+
+from __future__ import annotations
+
+
+def _split_long_sentence(text: str, max_len: int) -> list[str]:
+    """Split an overlong sentence into smaller parts.
+
+    Strategy: prefer splitting on strong intra-sentence separators near the
+    target length, falling back to whitespace.
+    """
+
+    # Fast path: already-trimmed short sentence (the common razdel output);
+    # str.strip() would allocate a new string even when nothing changes.
+    n = len(text)
+    if 0 < n <= max_len and not text[0].isspace() and not text[-1].isspace():
+        return [text]
+
+    text = text.strip()
+    if not text:
+        return []
+    if len(text) <= max_len:
+        return [text]
+
+    parts: list[str] = []
+    # Work with offsets into `text` rather than re-slicing the remainder on
+    # every iteration (which is quadratic on long monologues).
+    pos = 0
+    end = len(text)
+
+    # Prefer these break characters (ordered)
+    break_chars = [";", ":", ",", "—"]
+
+    # Try to find a separator between 70%..100% of max_len
+    start_search = int(max_len * 0.70)
+
+    while end - pos > max_len:
+        window_start = pos + start_search
+        window_end = pos + max_len + 1
+
+        cut = -1
+        for ch in break_chars:
+            idx = text.rfind(ch, window_start, window_end)
+            if idx != -1:
+                cut = idx + 1  # keep punctuation
+                break
+
+        # Fallback: cut at last whitespace
+        if cut == -1:
+            idx = text.rfind(" ", window_start, window_end)
+            if idx != -1:
+                cut = idx
+            else:
+                cut = pos + max_len
+
+        head = text[pos:cut].strip()
+        if head:
+            parts.append(head)
+
+        # Skip leading whitespace of the remainder (text is already right-stripped).
+        pos = cut
+        while pos < end and text[pos].isspace():
+            pos += 1
+
+    if pos < end:
+        parts.append(text[pos:])
+
+    return parts
+
+
+def smart_grouping(*, sentences: list[str], max_len: int, min_len: int) -> list[str]:
+    """Group sentence strings into chunks to fit length constraints."""
+    # First, expand any single overlong sentences. Parts come back stripped
+    # and non-empty, so chunks are only joined once, when they are closed.
+    expanded: list[str] = []
+    for s in sentences:
+        expanded.extend(_split_long_sentence(s, max_len))
+
+    chunks: list[str] = []
+    current: list[str] = []
+    current_len = 0
+
+    for sent_text in expanded:
+        sent_len = len(sent_text)
+
+        # If the next sentence fits, append
+        if current and (current_len + 1 + sent_len) <= max_len:
+            current.append(sent_text)
+            current_len += 1 + sent_len
+            continue
+
+        # Would exceed max_len (or nothing open yet): close current chunk if
+        # present and start a new one with this sentence.
+        if current:
+            chunks.append(" ".join(current))
+        current = [sent_text]
+        current_len = sent_len
+
+    # Tail
+    if current:
+        last = " ".join(current)
+        if current_len < min_len and chunks:
+            prev = chunks[-1]
+            # allow slight overflow to avoid "orphans"
+            if len(prev) + 1 + current_len <= (max_len + 50):
+                chunks[-1] = prev + " " + last
+            else:
+                chunks.append(last)
+        else:
+            chunks.append(last)
+
+    return chunks
@@ -4,101 +4,451 @@ Full dataset validation for Piper training.
 Generates TSV + Markdown report with PASS/FAIL verdict.
 """
 import argparse
+import atexit
 import csv
+import inspect
 import json
+import os
+import queue
 import re
+import sqlite3
+import struct
 import sys
+import threading
 import time
+import weakref
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
+from itertools import chain, islice, tee
 from pathlib import Path
-from difflib import SequenceMatcher
 
 try:
     import soundfile as sf
 except Exception:  # pragma: no cover
     sf = None
 
-CYRILLIC_RE = re.compile(r"[А-Яа-яЁё]")
-LATIN_RE = re.compile(r"[A-Za-z]")
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None
+
 NON_PRINTABLE_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F]")
+_WORD_RE = re.compile(r"[a-zа-яё0-9]+")
+
+# Maps every Cyrillic letter ([А-Яа-яЁё]) to "C" and every Latin letter
+# ([A-Za-z]) to "L"; since ASCII "C"/"L" themselves map to "L", counting "C"/"L" in
+# the translated text gives both class counts without regex passes.
+_LETTER_CLASS_TABLE = str.maketrans(
+    {
+        **{chr(c): "C" for c in range(ord("А"), ord("я") + 1)},
+        "Ё": "C",
+        "ё": "C",
+        **{chr(c): "L" for c in range(ord("A"), ord("Z") + 1)},
+        **{chr(c): "L" for c in range(ord("a"), ord("z") + 1)},
+    }
+)
+
+
+def count_letters(text: str) -> tuple[int, int]:
+    """Return (cyrillic, cyrillic + latin) letter counts."""
+    coded = text.translate(_LETTER_CLASS_TABLE)
+    cyr = coded.count("C")
+    return cyr, cyr + coded.count("L")
 
 
 def normalize_text(text: str) -> str:
-    text = text.lower()
-    text = re.sub(r"[^a-zа-яё0-9\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    # Any run of characters outside [a-zа-яё0-9] (whitespace included)
+    # collapses to a single space; joining the kept runs needs no strip().
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+_SIM_FN = None
+
+
+def _select_similarity_fn():
+    try:
+        # Indel similarity is 2*LCS/(len(a)+len(b)), the same scale as
+        # SequenceMatcher.ratio(), computed in C++.
+        from rapidfuzz.distance import Indel  # type: ignore
+
+        return Indel.normalized_similarity
+    except Exception:
+        pass
+    try:
+        # C port of difflib with identical results.
+        from cydifflib import SequenceMatcher  # type: ignore
+    except ImportError:
+        from difflib import SequenceMatcher
+
+    # autojunk would drop characters that are "popular" in hypotheses longer
+    # than 200 chars, which skews the ratio for long texts.
+    return lambda a, b: SequenceMatcher(None, a, b, autojunk=False).ratio()
 
 
 def compute_similarity(a: str, b: str) -> float:
-    return SequenceMatcher(a=a, b=b).ratio() if a or b else 1.0
+    global _SIM_FN
+    if not (a or b):
+        return 1.0
+    if _SIM_FN is None:
+        # Imported on first use so runs without --whisper skip both imports.
+        _SIM_FN = _select_similarity_fn()
+    return _SIM_FN(a, b)
+
+
+_BULK_SIM_FN = None
+
+
+def _select_bulk_similarity_fn():
+    try:
+        import numpy as np
+        from rapidfuzz.distance import Indel  # type: ignore
+        from rapidfuzz.process import cpdist  # type: ignore  # rapidfuzz >= 3.6
+    except Exception:
+        return lambda refs, hyps: [compute_similarity(a, b) for a, b in zip(refs, hyps)]
+
+    # Element-wise scores for the whole batch in one C++ call; float64 keeps
+    # the values identical to Indel.normalized_similarity.
+    return lambda refs, hyps: cpdist(
+        refs, hyps, scorer=Indel.normalized_similarity, dtype=np.float64
+    ).tolist()
+
+
+def compute_similarities(refs: list[str], hyps: list[str]) -> list[float]:
+    """compute_similarity over two aligned lists."""
+    global _BULK_SIM_FN
+    if not refs:
+        return []
+    if _BULK_SIM_FN is None:
+        _BULK_SIM_FN = _select_bulk_similarity_fn()
+    return _BULK_SIM_FN(refs, hyps)
 
 
 def load_config(config_path: Path):
     if not config_path.exists():
         return None
     try:
+        if orjson is not None:
+            return orjson.loads(config_path.read_bytes())
         return json.loads(config_path.read_text(encoding="utf-8"))
     except Exception:
         return None
 
 
 def read_metadata(csv_path: Path):
-    rows = []
+    """Yield (row, wav, text, row_issue) for each metadata row, streaming."""
     with csv_path.open("r", encoding="utf-8") as f:
         reader = csv.reader(f, delimiter="|")
         for i, row in enumerate(reader, start=1):
             if not row or all(not part.strip() for part in row):
-                rows.append((i, "", "", "empty_row"))
+                yield (i, "", "", "empty_row")
                 continue
             if len(row) < 2:
-                rows.append((i, row[0].strip(), "", "missing_text"))
+                yield (i, row[0].strip(), "", "missing_text")
                 continue
-            wav, text = row[0].strip(), row[1].strip()
-            rows.append((i, wav, text, ""))
-    return rows
+            yield (i, row[0].strip(), row[1].strip(), "")
 
 
-def check_audio_info(wav_path: Path, expected_sr: int | None):
-    if sf is None:
-        return {"error": "soundfile_not_installed"}
+_WAV_SUBTYPES = {
+    (1, 8): "PCM_U8",
+    (1, 16): "PCM_16",
+    (1, 24): "PCM_24",
+    (1, 32): "PCM_32",
+    (3, 32): "FLOAT",
+    (3, 64): "DOUBLE",
+}
+
+
+def _fast_wav_info(wav_path: Path):
+    """Parse (samplerate, channels, subtype, frames) from a plain RIFF/WAVE header.
+
+    Walks the chunks in the first 4 KiB (ffmpeg puts a LIST chunk before
+    data). Returns None for anything unusual (RF64, WAVE_FORMAT_EXTENSIBLE,
+    truncated headers, ...) so the caller can fall back to soundfile.
+    """
     try:
-        info = sf.info(str(wav_path))
-    except Exception:
-        return {"error": "invalid_audio"}
+        with open(wav_path, "rb") as f:
+            hdr = f.read(4096)
+            file_size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+
+    if len(hdr) < 12 or hdr[0:4] != b"RIFF" or hdr[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(hdr):
+        chunk_id = hdr[pos : pos + 4]
+        (chunk_size,) = struct.unpack_from("<I", hdr, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or body + 16 > len(hdr):
+                return None
+            fmt_tag, channels, samplerate, _byte_rate, block_align, bits = struct.unpack_from(
+                "<HHIIHH", hdr, body
+            )
+            fmt = (fmt_tag, channels, samplerate, block_align, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            fmt_tag, channels, samplerate, block_align, bits = fmt
+            subtype = _WAV_SUBTYPES.get((fmt_tag, bits))
+            if subtype is None or not channels or not block_align:
+                return None
+            data_size = min(chunk_size, file_size - body)
+            return samplerate, channels, subtype, max(0, data_size) // block_align
+        pos = body + chunk_size + (chunk_size & 1)
+
+    return None
+
+
+def check_audio_info(wav_path: Path, expected_sr: int | None):
+    fast = _fast_wav_info(wav_path)
+    if fast is not None:
+        samplerate, channels, subtype, frames = fast
+    else:
+        if sf is None:
+            return {"error": "soundfile_not_installed"}
+        try:
+            info = sf.info(str(wav_path))
+        except Exception:
+            return {"error": "invalid_audio"}
+        samplerate, channels, subtype, frames = info.samplerate, info.channels, info.subtype, info.frames
 
     issues = []
-    if info.channels != 1:
+    if channels != 1:
         issues.append("not_mono")
-    if info.subtype != "PCM_16":
+    if subtype != "PCM_16":
         issues.append("not_pcm16")
-    if expected_sr and info.samplerate != expected_sr:
+    if expected_sr and samplerate != expected_sr:
         issues.append("sample_rate_mismatch")
-    duration = info.frames / info.samplerate if info.samplerate else 0
+    duration = frames / samplerate if samplerate else 0
     if duration <= 0.2:
         issues.append("too_short")
 
     return {
-        "samplerate": info.samplerate,
-        "channels": info.channels,
-        "subtype": info.subtype,
+        "samplerate": samplerate,
+        "channels": channels,
+        "subtype": subtype,
         "duration": duration,
+        "frames": frames,
         "issues": issues,
     }
 
 
-_WHISPER_MODEL_CACHE: dict[tuple[str, str, str, str], object] = {}
+def _has_speech(wav_path: Path) -> bool:
+    """Run faster-whisper's bundled Silero VAD (CPU) over the wav."""
+    from faster_whisper import decode_audio  # type: ignore
+    from faster_whisper.vad import get_speech_timestamps  # type: ignore
+
+    try:
+        audio = decode_audio(str(wav_path), sampling_rate=16000)
+    except Exception:
+        # undecodable: leave it to the other checks / Whisper to report
+        return True
+    return bool(get_speech_timestamps(audio))
+
+
+@dataclass(frozen=True)
+class AudioMeta:
+    row_num: int
+    wav_name: str
+    text: str
+    duration: float
+    frames: int
+    samplerate: int
+    issues: tuple[str, ...]
+
+
+def check_row(
+    row,
+    *,
+    wavs_dir: Path,
+    expected_sr: int | None,
+    min_text_len: int,
+    max_text_len: int,
+    min_cyrillic_ratio: float,
+    pre_vad: bool = False,
+):
+    """Run the per-row text and audio checks (everything except Whisper).
+
+    The wav is expected to exist. Returns (text_codes, audio_codes,
+    duration, frames, samplerate): issue codes only, so results sent back
+    from a process pool do not carry the row's text, plus the header info
+    the Whisper phase reuses (0 if the header could not be read).
+    Module-level so it can be dispatched to a process pool.
+    """
+    _row_num, wav_name, text, _row_issue = row
+    wav_path = wavs_dir / wav_name
+
+    text_codes = []
+
+    # Text checks
+    # isprintable() is a C-level precheck: all-printable text cannot contain
+    # the control characters NON_PRINTABLE_RE looks for.
+    if not text.isprintable() and NON_PRINTABLE_RE.search(text):
+        text_codes.append("non_printable")
+    text_len = len(text)
+    if text_len < min_text_len:
+        text_codes.append("too_short_text")
+    if text_len > max_text_len:
+        text_codes.append("too_long_text")
+
+    cyr, letters = count_letters(text)
+    ratio = (cyr / letters) if letters else 0.0
+    if ratio < min_cyrillic_ratio:
+        text_codes.append("low_cyrillic_ratio")
 
+    # Audio checks
+    audio_info = check_audio_info(wav_path, expected_sr)
+    if "error" in audio_info:
+        audio_codes = (audio_info["error"],)
+    else:
+        audio_codes = tuple(audio_info.get("issues") or ())
+        if pre_vad and "too_short" not in audio_codes and not _has_speech(wav_path):
+            audio_codes += ("too_silent",)
+
+    return (
+        tuple(text_codes),
+        audio_codes,
+        audio_info.get("duration", 0.0),
+        audio_info.get("frames", 0),
+        audio_info.get("samplerate", 0),
+    )
 
-def _load_whisper_model(backend: str, model_name: str, device: str, compute_type: str):
-    key = (backend, model_name, device, compute_type)
-    if key in _WHISPER_MODEL_CACHE:
-        return _WHISPER_MODEL_CACHE[key]
+
+def check_rows_chunk(rows, **kwargs):
+    """check_row over a list of rows, to amortize process-pool round trips."""
+    return [check_row(row, **kwargs) for row in rows]
+
+
+def _chunked(items, size: int):
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _duration_sorted_batches(ready: queue.Queue, *, step: int, window: int):
+    """Yield batches of up to `step` (idx, AudioMeta) items from a None-terminated queue.
+
+    Items are buffered up to `window` at a time and sorted shortest first, so
+    each batch holds clips of similar length and padding stays small.
+    """
+    pending = []
+    while True:
+        item = ready.get()
+        if item is not None:
+            pending.append(item)
+            if len(pending) < window:
+                continue
+        pending.sort(key=lambda r: r[1].duration)
+        for start in range(0, len(pending), step):
+            yield pending[start : start + step]
+        pending = []
+        if item is None:
+            return
+
+
+def prefetch_map(fn, items, *, executor: Executor, window: int):
+    """In-order map that keeps at most `window` calls in flight.
+
+    Unlike Executor.map this does not submit every item up front, so it is
+    suitable for overlapping I/O (wav header reads) with result handling.
+    """
+    it = iter(items)
+    pending = deque(executor.submit(fn, item) for item in islice(it, window))
+    while pending:
+        result = pending.popleft().result()
+        for item in islice(it, 1):
+            pending.append(executor.submit(fn, item))
+        yield result
+
+
+def _resolve_compute_type(compute_type: str, device: str) -> str:
+    """Map "auto" to the fastest faster-whisper compute type for the device.
+
+    bfloat16 where the GPU supports it (SM80+, Ampere and newer), float16 on
+    older GPUs, and CTranslate2's own default elsewhere.
+    """
+    if compute_type != "auto":
+        return compute_type
+    if not device.startswith("cuda"):
+        return "default"
+    try:
+        import ctranslate2  # type: ignore
+
+        supported = ctranslate2.get_supported_compute_types("cuda")
+    except Exception:
+        return "float16"
+    for candidate in ("bfloat16", "float16"):
+        if candidate in supported:
+            return candidate
+    return "default"
+
+
+# Weak values: a model lives as long as a caller holds it, so repeated
+# in-process runs with different models do not pin old ones in VRAM.
+_WHISPER_MODEL_CACHE: "weakref.WeakValueDictionary[tuple, object]" = weakref.WeakValueDictionary()
+
+
+def _unload_whisper_models() -> None:
+    """Drop cached models and release cached CUDA memory (torch backend)."""
+    _WHISPER_MODEL_CACHE.clear()
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        try:
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+
+atexit.register(_unload_whisper_models)
+
+
+def _load_whisper_model(
+    backend: str,
+    model_name: str,
+    device: str,
+    compute_type: str,
+    *,
+    batch_size: int = 0,
+    num_workers: int = 1,
+    device_index: list[int] | None = None,
+):
+    """Load a Whisper model once per process.
+
+    For faster-whisper with batch_size > 0 the model is wrapped in a
+    BatchedInferencePipeline so decoding windows are batched on the GPU.
+    A device_index list loads one replica per GPU (faster-whisper only).
+    """
+    key = (backend, model_name, device, compute_type, batch_size, num_workers, tuple(device_index or ()))
+    model = _WHISPER_MODEL_CACHE.get(key)
+    if model is not None:
+        return model
 
     if backend == "faster-whisper":
         from faster_whisper import WhisperModel  # type: ignore
 
-        model = WhisperModel(model_name, device=device, compute_type=compute_type)
+        model = WhisperModel(
+            model_name,
+            device=device,
+            device_index=device_index or 0,
+            compute_type=_resolve_compute_type(compute_type, device),
+            num_workers=max(1, num_workers),
+        )
+        if batch_size > 0:
+            try:
+                from faster_whisper import BatchedInferencePipeline  # type: ignore
+
+                model = BatchedInferencePipeline(model=model)
+            except ImportError:
+                # older faster-whisper versions: plain sequential decoding
+                pass
     elif backend == "whisper":
         import whisper  # type: ignore
 
@@ -122,49 +472,285 @@ def _select_whisper_backend(preferred: str) -> str:
         return "whisper"
 
 
-def whisper_transcribe(
-    wav_path: Path,
-    *,
+def _accepts_kwarg(fn, name: str) -> bool:
+    try:
+        params = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return True
+    return name in params or any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values())
+
+
+def make_whisper_transcriber(
     backend: str,
     model,
+    *,
     device: str,
     language: str | None,
     batch_size: int,
-    num_workers: int,
     beam_size: int,
     vad_filter: bool,
 ):
+    """Bind the decoding options once; returns fn(audio) -> hypothesis text.
+
+    audio is a wav path or, for faster-whisper, an already decoded 16 kHz
+    float32 array. Whether model.transcribe takes batch_size (older
+    faster-whisper versions have no batched pipeline) is checked here rather
+    than on every call.
+    """
     if backend == "faster-whisper":
         kwargs = {
             "beam_size": beam_size,
             "language": language,
             "vad_filter": vad_filter,
         }
-        if batch_size > 0:
+        if batch_size > 0 and _accepts_kwarg(model.transcribe, "batch_size"):
             kwargs["batch_size"] = batch_size
-        if num_workers > 0:
-            kwargs["num_workers"] = num_workers
-        try:
-            segments, _ = model.transcribe(str(wav_path), **kwargs)
-        except TypeError:
-            # fallback for older faster-whisper versions
-            kwargs.pop("batch_size", None)
-            kwargs.pop("num_workers", None)
-            segments, _ = model.transcribe(str(wav_path), **kwargs)
-        text = " ".join(seg.text for seg in segments)
-        return text.strip()
+        transcribe = partial(model.transcribe, **kwargs)
 
-    if backend == "whisper":
-        result = model.transcribe(
-            str(wav_path),
-            fp16=(device == "cuda"),
-            language=language,
+        pipeline_cls = _batched_pipeline_class(backend)
+        if vad_filter or pipeline_cls is None or not isinstance(model, pipeline_cls):
+
+            def run(audio) -> str:
+                segments, _ = transcribe(str(audio) if isinstance(audio, Path) else audio)
+                return " ".join(seg.text for seg in segments).strip()
+
+            return run
+
+        # Without VAD the batched pipeline needs clip_timestamps for audio
+        # longer than one window; such clips go through the plain model,
+        # which does its own sequential windowing.
+        from faster_whisper import decode_audio  # type: ignore
+
+        extractor = model.model.feature_extractor
+        max_samples = extractor.chunk_length * extractor.sampling_rate
+        transcribe_long = partial(
+            model.model.transcribe, beam_size=beam_size, language=language, vad_filter=False
         )
-        return (result.get("text") or "").strip()
+
+        def run(audio) -> str:
+            if not hasattr(audio, "shape"):
+                audio = decode_audio(str(audio), sampling_rate=extractor.sampling_rate)
+            segments, _ = (transcribe if len(audio) <= max_samples else transcribe_long)(audio)
+            return " ".join(seg.text for seg in segments).strip()
+
+        return run
+
+    if backend == "whisper":
+        transcribe = partial(model.transcribe, fp16=(device == "cuda"), language=language)
+
+        def run(wav_path: Path) -> str:
+            return (transcribe(str(wav_path)).get("text") or "").strip()
+
+        return run
 
     raise RuntimeError("Whisper backend not available")
 
 
+def whisper_transcribe(
+    wav_path: Path,
+    *,
+    backend: str,
+    model,
+    device: str,
+    language: str | None,
+    batch_size: int,
+    beam_size: int,
+    vad_filter: bool,
+):
+    return make_whisper_transcriber(
+        backend,
+        model,
+        device=device,
+        language=language,
+        batch_size=batch_size,
+        beam_size=beam_size,
+        vad_filter=vad_filter,
+    )(wav_path)
+
+
+def _batched_pipeline_class(backend: str):
+    if backend != "faster-whisper":
+        return None
+    try:
+        from faster_whisper import BatchedInferencePipeline  # type: ignore
+    except ImportError:
+        return None
+    return BatchedInferencePipeline
+
+
+def _clip_timestamps_in_samples() -> bool:
+    """faster-whisper before 1.2 reads batched clip_timestamps as sample indices."""
+    try:
+        from faster_whisper.version import __version__  # type: ignore
+    except ImportError:
+        return False
+    major_minor = tuple(int(part) for part in re.findall(r"\d+", __version__)[:2])
+    return major_minor < (1, 2)
+
+
+def _transcribe_concatenated(model, audios, *, language, batch_size: int, beam_size: int):
+    """Decode several short clips in one BatchedInferencePipeline call.
+
+    The clips are concatenated and passed as clip_timestamps, so each wav is
+    one chunk of the GPU batch. Every segment carries its chunk offset in
+    seek, which maps it back to its wav; segment start times are not used,
+    since hallucinated timestamps can run past the end of the clip.
+    """
+    import numpy as np
+
+    sampling_rate = model.model.feature_extractor.sampling_rate
+    frames_per_second = model.model.frames_per_second
+    scale = 1 if _clip_timestamps_in_samples() else 1 / sampling_rate
+    start_frames = []
+    clips = []
+    pos = 0
+    for audio in audios:
+        start_frames.append(pos / sampling_rate * frames_per_second)
+        clips.append({"start": pos * scale, "end": (pos + len(audio)) * scale})
+        pos += len(audio)
+
+    segments, _ = model.transcribe(
+        np.concatenate(audios),
+        language=language,
+        beam_size=beam_size,
+        batch_size=batch_size,
+        clip_timestamps=clips,
+    )
+    texts = [[] for _ in audios]
+    for seg in segments:
+        # seek is the chunk offset truncated to whole frames
+        i = max(0, bisect_right(start_frames, seg.seek + 1) - 1)
+        texts[i].append(seg.text)
+    return [" ".join(parts).strip() for parts in texts]
+
+
+def whisper_transcribe_batch(
+    wav_paths: list[Path],
+    *,
+    backend: str,
+    model,
+    device: str,
+    language: str | None,
+    batch_size: int,
+    beam_size: int,
+    vad_filter: bool,
+    transcribe_one=None,
+):
+    """Transcribe several wavs, returning a hypothesis or an exception per path.
+
+    With a faster-whisper BatchedInferencePipeline, clips that fit in one
+    decoding window are transcribed together in a single call. Everything
+    else (longer clips, VAD filtering, the whisper backend, or a failed batch)
+    goes one file at a time through transcribe_one, a make_whisper_transcriber
+    result built from the same options if not given.
+    """
+    results: list = [None] * len(wav_paths)
+    decoded: list = [None] * len(wav_paths)
+
+    pipeline_cls = _batched_pipeline_class(backend)
+    if pipeline_cls is not None and isinstance(model, pipeline_cls) and not vad_filter and len(wav_paths) > 1:
+        from faster_whisper import decode_audio  # type: ignore
+
+        extractor = model.model.feature_extractor
+        max_samples = extractor.chunk_length * extractor.sampling_rate
+        batch_idx = []
+        audios = []
+        for i, wav_path in enumerate(wav_paths):
+            try:
+                audio = decode_audio(str(wav_path), sampling_rate=extractor.sampling_rate)
+            except Exception as exc:
+                results[i] = exc
+                continue
+            # Clips left to the per-file path reuse this decode.
+            decoded[i] = audio
+            if 0 < len(audio) <= max_samples:
+                batch_idx.append(i)
+                audios.append(audio)
+        if len(audios) > 1:
+            try:
+                hyps = _transcribe_concatenated(
+                    model,
+                    audios,
+                    language=language,
+                    batch_size=batch_size,
+                    beam_size=beam_size,
+                )
+            except Exception as exc:
+                # leave these to the per-file path so errors stay per wav
+                print(f"[warn] batched whisper call failed, decoding per file: {exc!r}", flush=True)
+                hyps = []
+            for i, hyp in zip(batch_idx, hyps):
+                results[i] = hyp
+
+    for i, wav_path in enumerate(wav_paths):
+        if results[i] is not None:
+            continue
+        if transcribe_one is None:
+            transcribe_one = make_whisper_transcriber(
+                backend,
+                model,
+                device=device,
+                language=language,
+                batch_size=batch_size,
+                beam_size=beam_size,
+                vad_filter=vad_filter,
+            )
+        try:
+            results[i] = transcribe_one(wav_path if decoded[i] is None else decoded[i])
+        except Exception as exc:
+            results[i] = exc
+    return results
+
+
+class WhisperCache:
+    """Hypotheses from earlier runs in a sqlite file.
+
+    Entries are keyed by absolute wav path and the decoding options, and are
+    only used while the wav's mtime and size are unchanged, so reruns that
+    only tweak text-level thresholds skip the GPU pass.
+    """
+
+    def __init__(self, path: Path, options: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.options = options
+        # Shard validators may share one cache file, hence WAL and a timeout.
+        self.conn = sqlite3.connect(str(path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hyps ("
+            "path TEXT, options TEXT, mtime_ns INTEGER, size INTEGER, hyp TEXT, "
+            "PRIMARY KEY (path, options))"
+        )
+
+    def get(self, wav_path: Path) -> str | None:
+        try:
+            st = os.stat(wav_path)
+        except OSError:
+            return None
+        row = self.conn.execute(
+            "SELECT mtime_ns, size, hyp FROM hyps WHERE path = ? AND options = ?",
+            (os.path.abspath(wav_path), self.options),
+        ).fetchone()
+        if row is not None and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return row[2]
+        return None
+
+    def put_many(self, items: list[tuple[Path, str]]) -> None:
+        rows = []
+        for wav_path, hyp in items:
+            try:
+                st = os.stat(wav_path)
+            except OSError:
+                continue
+            rows.append((os.path.abspath(wav_path), self.options, st.st_mtime_ns, st.st_size, hyp))
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO hyps VALUES (?, ?, ?, ?, ?)", rows)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Full dataset validation (100%)")
     parser.add_argument("--dataset", required=True, help="Path to dataset root")
@@ -177,6 +763,17 @@ def main():
     parser.add_argument("--whisper-device", default="cuda")
     parser.add_argument("--require-whisper", action="store_true")
     parser.add_argument("--report-dir", default="reports")
+    parser.add_argument(
+        "--wavs-dir",
+        default=None,
+        help="Directory with the wavs (default: <dataset>/wavs).",
+    )
+    parser.add_argument(
+        "--no-extra-wav-check",
+        action="store_true",
+        help="Do not report wavs that the metadata does not reference (for shards that "
+        "validate part of the metadata against a shared wavs dir).",
+    )
     parser.add_argument(
         "--whisper-backend",
         choices=["auto", "faster-whisper", "whisper"],
@@ -186,9 +783,44 @@ def main():
     parser.add_argument("--whisper-language", default=None, help="Force whisper language (e.g. ru)")
     parser.add_argument("--whisper-batch-size", type=int, default=8, help="Batch size for faster-whisper")
     parser.add_argument("--whisper-num-workers", type=int, default=2, help="Num workers for faster-whisper")
-    parser.add_argument("--whisper-compute-type", default="float16", help="Compute type for faster-whisper")
+    parser.add_argument(
+        "--whisper-device-index",
+        default=None,
+        help="Comma-separated GPU indices (e.g. 0,1): faster-whisper loads one model replica per GPU "
+        "in this process and batches are decoded on all of them concurrently.",
+    )
+    parser.add_argument(
+        "--whisper-compute-type",
+        default="auto",
+        help="Compute type for faster-whisper (auto picks bfloat16 on SM80+ GPUs, else float16; "
+        "int8_float16 trades a little accuracy for throughput).",
+    )
     parser.add_argument("--whisper-beam-size", type=int, default=5, help="Beam size for whisper decoding")
     parser.add_argument("--whisper-vad-filter", action="store_true", help="Enable VAD filter for faster-whisper")
+    parser.add_argument(
+        "--pre-vad",
+        action="store_true",
+        help="Run Silero VAD (bundled with faster-whisper, CPU) during the audio checks; wavs without "
+        "speech are reported as too_silent and skipped by Whisper.",
+    )
+    parser.add_argument(
+        "--whisper-cache",
+        default=None,
+        help="sqlite file caching Whisper hypotheses across runs "
+        "(default: <report-dir>/.whisper_cache.sqlite; empty string disables).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for the text/audio checks (1 disables the process pool).",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=8,
+        help="Threads prefetching wav headers when the process pool is disabled (0 = serial).",
+    )
     parser.add_argument(
         "--progress-every",
         type=int,
@@ -209,13 +841,19 @@ def main():
     )
     args = parser.parse_args()
 
+    if args.pre_vad:
+        try:
+            import faster_whisper.vad  # type: ignore  # noqa: F401
+        except ImportError:
+            raise SystemExit("--pre-vad needs faster-whisper (it bundles the Silero VAD model)")
+
     dataset = Path(args.dataset)
     report_dir = Path(args.report_dir)
     report_dir.mkdir(parents=True, exist_ok=True)
 
     config_path = dataset / "config.json"
     metadata_path = dataset / "metadata_2col.csv"
-    wavs_dir = dataset / "wavs"
+    wavs_dir = Path(args.wavs_dir) if args.wavs_dir else dataset / "wavs"
 
     errors = []
     if not config_path.exists():
@@ -230,10 +868,20 @@ def main():
     if config:
         expected_sr = config.get("audio", {}).get("sample_rate")
 
-    metadata_rows = read_metadata(metadata_path) if metadata_path.exists() else []
-    total_rows = len(metadata_rows)
+    # Rows are streamed; the total is only needed up front for progress
+    # lines printed while rows are still being read, which pays for one
+    # extra parse of the csv.
+    count_progress = args.progress_mode in {"count", "all"} and args.progress_every > 0
+    whisper_progress = args.whisper and args.progress_mode in {"whisper", "all"}
+    total_rows = None
+    if metadata_path.exists() and (count_progress or whisper_progress):
+        total_rows = sum(1 for _ in read_metadata(metadata_path))
 
-    wav_files = set(p.name for p in wavs_dir.glob("*.wav")) if wavs_dir.exists() else set()
+    wav_files: set[str] = set()
+    if wavs_dir.exists():
+        # DirEntry caches the file type, so no per-entry stat for plain files.
+        with os.scandir(wavs_dir) as it:
+            wav_files = {e.name for e in it if e.name.endswith(".wav") and e.is_file()}
 
     seen = set()
     missing_wav = []
@@ -244,102 +892,256 @@ def main():
     similarity_values = []
 
     start_time = time.time()
-    whisper_backend = None
-    whisper_model = None
-    if args.whisper:
-        whisper_backend = _select_whisper_backend(args.whisper_backend)
-        whisper_model = _load_whisper_model(
-            whisper_backend,
-            args.whisper_model,
-            args.whisper_device,
-            args.whisper_compute_type,
-        )
+    check_kwargs = dict(
+        wavs_dir=wavs_dir,
+        expected_sr=expected_sr,
+        min_text_len=args.min_text_len,
+        max_text_len=args.max_text_len,
+        min_cyrillic_ratio=args.min_cyrillic_ratio,
+        pre_vad=args.pre_vad,
+    )
 
-    for idx, (row_num, wav_name, text, row_issue) in enumerate(metadata_rows, start=1):
-        if args.progress_mode in {"count", "all"} and args.progress_every and idx % args.progress_every == 0:
-            elapsed = int(time.time() - start_time)
-            rate = (idx / elapsed) if elapsed > 0 else 0.0
-            print(
-                f"[progress] {idx}/{total_rows} rows, {rate:.2f} rows/s, elapsed={elapsed}s",
-                flush=True,
+    # Rows with a parse issue or a missing wav skip every other check. The
+    # listing already holds every plain *.wav file, so only names it cannot
+    # contain (nested paths, other extensions) fall back to a filesystem
+    # check. The checks consume the same stream a bounded window ahead of the
+    # aggregation loop, so tee only buffers that window.
+    def with_presence(rows):
+        for row in rows:
+            _row_num, wav_name, _text, row_issue = row
+            present = not row_issue and (
+                wav_name in wav_files
+                or (("/" in wav_name or not wav_name.endswith(".wav")) and (wavs_dir / wav_name).exists())
             )
-        if row_issue:
-            text_issues.append((row_num, wav_name, text, row_issue))
-            continue
+            yield row, present
 
-        if wav_name in seen:
-            duplicate_wav.append((row_num, wav_name, text, "duplicate_wav"))
-        seen.add(wav_name)
+    rows = read_metadata(metadata_path) if metadata_path.exists() else iter(())
+    agg_rows, check_source = tee(with_presence(rows))
+    check_rows = (row for row, present in check_source if present)
 
-        wav_path = wavs_dir / wav_name
-        if not wav_path.exists():
-            missing_wav.append((row_num, wav_name, text, "missing_wav"))
-            continue
+    executor: Executor | None = None
+    if args.workers > 1:
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+    elif args.io_threads > 0:
+        executor = ThreadPoolExecutor(max_workers=args.io_threads)
+    try:
+        if isinstance(executor, ProcessPoolExecutor):
+            check_results = chain.from_iterable(
+                prefetch_map(
+                    partial(check_rows_chunk, **check_kwargs),
+                    _chunked(check_rows, 64),
+                    executor=executor,
+                    window=2 * args.workers,
+                )
+            )
+        elif executor is not None:
+            # Single process: overlap wav header reads with result handling.
+            # Small chunks keep the reads parallel while paying one future
+            # per 16 rows instead of one per row.
+            check_results = chain.from_iterable(
+                prefetch_map(
+                    partial(check_rows_chunk, **check_kwargs),
+                    _chunked(check_rows, 16),
+                    executor=executor,
+                    window=2 * args.io_threads,
+                )
+            )
+        else:
+            check_results = map(partial(check_row, **check_kwargs), check_rows)
+
+        def aggregate(on_whisper_row) -> int:
+            """Collect check results in row order; return the row count."""
+            idx = 0
+            for idx, ((row_num, wav_name, text, row_issue), present) in enumerate(agg_rows, start=1):
+                if count_progress and idx % args.progress_every == 0:
+                    elapsed = int(time.time() - start_time)
+                    rate = (idx / elapsed) if elapsed > 0 else 0.0
+                    print(
+                        f"[progress] {idx}/{total_rows} rows, {rate:.2f} rows/s, elapsed={elapsed}s",
+                        flush=True,
+                    )
+                if row_issue:
+                    text_issues.append((row_num, wav_name, text, row_issue))
+                    continue
+
+                if wav_name in seen:
+                    duplicate_wav.append((row_num, wav_name, text, "duplicate_wav"))
+                seen.add(wav_name)
 
-        # Text checks
-        if NON_PRINTABLE_RE.search(text):
-            text_issues.append((row_num, wav_name, text, "non_printable"))
-        text_len = len(text)
-        if text_len < args.min_text_len:
-            text_issues.append((row_num, wav_name, text, "too_short_text"))
-        if text_len > args.max_text_len:
-            text_issues.append((row_num, wav_name, text, "too_long_text"))
-
-        letters = len(CYRILLIC_RE.findall(text)) + len(LATIN_RE.findall(text))
-        cyr = len(CYRILLIC_RE.findall(text))
-        ratio = (cyr / letters) if letters else 0.0
-        if ratio < args.min_cyrillic_ratio:
-            text_issues.append((row_num, wav_name, text, "low_cyrillic_ratio"))
-
-        # Audio checks
-        audio_info = check_audio_info(wav_path, expected_sr)
-        if "error" in audio_info:
-            audio_issues.append((row_num, wav_name, text, audio_info["error"]))
+                if not present:
+                    missing_wav.append((row_num, wav_name, text, "missing_wav"))
+                    continue
+
+                text_codes, audio_codes, duration, frames, samplerate = next(check_results)
+                # Codes unpickled from a worker are fresh strings; interning
+                # shares one object per code across all issue tuples.
+                text_codes = tuple(map(sys.intern, text_codes))
+                audio_codes = tuple(map(sys.intern, audio_codes))
+                text_issues.extend((row_num, wav_name, text, code) for code in text_codes)
+                audio_issues.extend((row_num, wav_name, text, code) for code in audio_codes)
+                # Clips already flagged too_short/too_silent carry no usable speech.
+                if args.whisper and "too_short" not in audio_codes and "too_silent" not in audio_codes:
+                    on_whisper_row(
+                        (idx, AudioMeta(row_num, wav_name, text, duration, frames, samplerate, audio_codes))
+                    )
+            return idx
+
+        if not args.whisper:
+            total_rows = aggregate(lambda item: None)
         else:
-            if audio_info.get("issues"):
-                for issue in audio_info["issues"]:
-                    audio_issues.append((row_num, wav_name, text, issue))
+            if isinstance(executor, ProcessPoolExecutor):
+                # With fork, the first submit starts every worker; do it before
+                # the model initializes CUDA in this process.
+                executor.submit(int).result()
+            whisper_backend = _select_whisper_backend(args.whisper_backend)
+            device_index = None
+            if args.whisper_device_index:
+                device_index = [int(i) for i in args.whisper_device_index.split(",") if i.strip()]
+                if whisper_backend != "faster-whisper":
+                    print("[warn] --whisper-device-index needs faster-whisper; using one device", flush=True)
+                    device_index = None
+            whisper_model = _load_whisper_model(
+                whisper_backend,
+                args.whisper_model,
+                args.whisper_device,
+                args.whisper_compute_type,
+                batch_size=args.whisper_batch_size,
+                num_workers=args.whisper_num_workers,
+                device_index=device_index,
+            )
 
-        # Whisper alignment
-        if args.whisper:
-            try:
-                hyp = whisper_transcribe(
-                    wav_path,
-                    backend=whisper_backend,
-                    model=whisper_model,
-                    device=args.whisper_device,
-                    language=args.whisper_language,
-                    batch_size=args.whisper_batch_size,
-                    num_workers=args.whisper_num_workers,
-                    beam_size=args.whisper_beam_size,
-                    vad_filter=args.whisper_vad_filter,
+            transcribe_one = make_whisper_transcriber(
+                whisper_backend,
+                whisper_model,
+                device=args.whisper_device,
+                language=args.whisper_language,
+                batch_size=args.whisper_batch_size,
+                beam_size=args.whisper_beam_size,
+                vad_filter=args.whisper_vad_filter,
+            )
+
+            cache = None
+            cache_path = (
+                args.whisper_cache if args.whisper_cache is not None else str(report_dir / ".whisper_cache.sqlite")
+            )
+            if cache_path:
+                # Key on what actually ran: with "auto" the precision depends
+                # on the device, so GPU and CPU hypotheses must not mix.
+                cache = WhisperCache(
+                    Path(cache_path),
+                    "|".join(
+                        str(v)
+                        for v in (
+                            whisper_backend,
+                            args.whisper_model,
+                            args.whisper_device.split(":")[0],
+                            _resolve_compute_type(args.whisper_compute_type, args.whisper_device),
+                            args.whisper_language,
+                            args.whisper_beam_size,
+                            args.whisper_vad_filter,
+                        )
+                    ),
                 )
-                sim = compute_similarity(normalize_text(text), normalize_text(hyp))
-                similarity_values.append(sim)
-                if sim < args.similarity_threshold:
-                    whisper_issues.append((row_num, wav_name, text, f"low_similarity:{sim:.3f}"))
-                if args.progress_mode in {"whisper", "all"}:
-                    safe_text = text.replace("\t", " ")
-                    wav_rel = f"wavs/{wav_name}"
-                    detail = f"[whisper] {idx}/{total_rows} {wav_name} sim={sim:.3f}"
-                    if args.progress_detail in {"text", "text+path"}:
-                        detail += f" text=\"{safe_text}\""
-                    if args.progress_detail == "text+path":
-                        detail += f" path={wav_rel}"
-                    print(detail, flush=True)
-            except Exception as exc:
-                whisper_issues.append((row_num, wav_name, text, f"whisper_error:{exc}"))
-                if args.progress_mode in {"whisper", "all"}:
-                    safe_text = text.replace("\t", " ")
-                    wav_rel = f"wavs/{wav_name}"
-                    detail = f"[whisper] {idx}/{total_rows} {wav_name} error={exc}"
-                    if args.progress_detail in {"text", "text+path"}:
-                        detail += f" text=\"{safe_text}\""
-                    if args.progress_detail == "text+path":
-                        detail += f" path={wav_rel}"
-                    print(detail, flush=True)
-
-    extra_wav = sorted(wav_files - seen)
+
+            # The checks run on a producer thread (their I/O and the pool
+            # round trips release the GIL) and hand rows to Whisper through a
+            # queue, so the GPU is busy while the rest of the dataset is
+            # still being checked. The model only lives in this thread.
+            ready: queue.Queue = queue.Queue()
+            producer_result: dict[str, object] = {}
+
+            def produce() -> None:
+                try:
+                    producer_result["rows"] = aggregate(ready.put)
+                except BaseException as exc:
+                    producer_result["error"] = exc
+                finally:
+                    ready.put(None)
+
+            producer = threading.Thread(target=produce, name="validate-checks", daemon=True)
+            producer.start()
+
+            def looked_up(batches):
+                # Runs on this thread: the sqlite connection is not shared.
+                for batch in batches:
+                    wav_paths = [wavs_dir / meta.wav_name for _idx, meta in batch]
+                    hyps = [cache.get(p) for p in wav_paths] if cache else [None] * len(batch)
+                    yield batch, wav_paths, hyps
+
+            def transcribe(item):
+                batch, wav_paths, hyps = item
+                todo = [i for i, hyp in enumerate(hyps) if hyp is None]
+                if todo:
+                    fresh = whisper_transcribe_batch(
+                        [wav_paths[i] for i in todo],
+                        backend=whisper_backend,
+                        model=whisper_model,
+                        device=args.whisper_device,
+                        language=args.whisper_language,
+                        batch_size=args.whisper_batch_size,
+                        beam_size=args.whisper_beam_size,
+                        vad_filter=args.whisper_vad_filter,
+                        transcribe_one=transcribe_one,
+                    )
+                    for i, hyp in zip(todo, fresh):
+                        hyps[i] = hyp
+                return batch, wav_paths, hyps, todo
+
+            step = max(1, args.whisper_batch_size)
+            batches = looked_up(_duration_sorted_batches(ready, step=step, window=step * 32))
+            # With several GPUs, one batch per model replica is in flight;
+            # CTranslate2 routes concurrent calls to idle replicas.
+            replicas = len(device_index) if device_index else 1
+            whisper_pool = ThreadPoolExecutor(max_workers=replicas) if replicas > 1 else None
+            if whisper_pool is not None:
+                transcribed = prefetch_map(transcribe, batches, executor=whisper_pool, window=replicas)
+            else:
+                transcribed = map(transcribe, batches)
+            for batch, wav_paths, hyps, todo in transcribed:
+                if cache and todo:
+                    cache.put_many([(wav_paths[i], hyps[i]) for i in todo if isinstance(hyps[i], str)])
+                # Score the whole batch at once; results follow batch order.
+                scored = [
+                    (meta.text, hyp) for (_idx, meta), hyp in zip(batch, hyps) if not isinstance(hyp, Exception)
+                ]
+                sims = iter(
+                    compute_similarities(
+                        [normalize_text(text) for text, _hyp in scored],
+                        [normalize_text(hyp) for _text, hyp in scored],
+                    )
+                )
+                for (idx, meta), hyp in zip(batch, hyps):
+                    row_num, wav_name, text = meta.row_num, meta.wav_name, meta.text
+                    if isinstance(hyp, Exception):
+                        whisper_issues.append((row_num, wav_name, text, f"whisper_error:{hyp}"))
+                        detail = f"[whisper] {idx}/{total_rows} {wav_name} error={hyp}"
+                    else:
+                        sim = next(sims)
+                        similarity_values.append(sim)
+                        if sim < args.similarity_threshold:
+                            whisper_issues.append((row_num, wav_name, text, f"low_similarity:{sim:.3f}"))
+                        detail = f"[whisper] {idx}/{total_rows} {wav_name} sim={sim:.3f}"
+                    if whisper_progress:
+                        safe_text = text.replace("\t", " ")
+                        wav_rel = f"wavs/{wav_name}"
+                        if args.progress_detail in {"text", "text+path"}:
+                            detail += f" text=\"{safe_text}\""
+                        if args.progress_detail == "text+path":
+                            detail += f" path={wav_rel}"
+                        print(detail, flush=True)
+            if whisper_pool is not None:
+                whisper_pool.shutdown()
+            producer.join()
+            if cache:
+                cache.close()
+            if "error" in producer_result:
+                raise producer_result["error"]
+            total_rows = producer_result["rows"]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    extra_wav = [] if args.no_extra_wav_check else sorted(wav_files - seen)
 
     # Summary
     total_wavs = len(wav_files)
@@ -367,12 +1169,22 @@ def main():
     # Write TSV
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     tsv_path = report_dir / f"validation_{ts}.tsv"
-    with tsv_path.open("w", encoding="utf-8", newline="") as f:
-        f.write("row\twav\ttext\tissue\n")
-        for row in missing_wav + duplicate_wav + text_issues + audio_issues + whisper_issues:
-            f.write("\t".join([str(row[0]), row[1], row[2], row[3]]) + "\n")
-        for wav_name in extra_wav:
-            f.write("\t".join(["-", wav_name, "", "extra_wav"]) + "\n")
+    with tsv_path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        # csv quoting keeps rows parseable (e.g. by listen_and_verify.py's
+        # DictReader) when text contains quotes or tabs.
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(["row", "wav", "text", "issue"])
+        # One line per metadata row, with all of its issue codes joined by ';'
+        # (whisper_error:<text> may itself contain commas).
+        issues_by_row: dict[int, tuple[str, str, list[str]]] = {}
+        for issues in (missing_wav, duplicate_wav, text_issues, audio_issues, whisper_issues):
+            for row_num, wav_name, text, issue in issues:
+                issues_by_row.setdefault(row_num, (wav_name, text, []))[2].append(issue)
+        writer.writerows(
+            (row_num, wav_name, text, ";".join(codes))
+            for row_num, (wav_name, text, codes) in sorted(issues_by_row.items())
+        )
+        writer.writerows(("-", wav_name, "", "extra_wav") for wav_name in extra_wav)
 
     # Write Markdown report
     md_path = report_dir / f"validation_{ts}.md"
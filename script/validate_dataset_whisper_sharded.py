@@ -3,7 +3,11 @@
 
 Whisper itself is not multi-GPU for a single transcription run, so we shard the
 metadata and run multiple validator processes (one per GPU) against temporary
-shard datasets with symlinked wavs.
+shard datasets. Each shard holds only config.json and its metadata; all shard
+validators read wavs from the original dataset via --wavs-dir.
+
+With --in-process (faster-whisper only) a single validator instead loads one
+model replica per GPU and validates the whole dataset without sharding.
 
 This script is local-only and does not use paid APIs.
 
@@ -18,15 +22,18 @@ from __future__ import annotations
 
 import argparse
 import csv
+import heapq
 import os
 import shutil
 import subprocess
-import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 
+from launch_utils import pick_python
+
 
 @dataclass(frozen=True)
 class ShardResult:
@@ -47,11 +54,36 @@ def _read_metadata_lines(metadata_path: Path) -> list[str]:
     return lines
 
 
-def _round_robin(lines: list[str], n: int) -> list[list[str]]:
-    shards: list[list[str]] = [[] for _ in range(n)]
-    for i, line in enumerate(lines):
-        shards[i % n].append(line)
-    return shards
+def _wav_weights(lines: list[str], wavs_dir: Path, *, threads: int = 16) -> list[int]:
+    """Per-line wav size in bytes (0 if missing).
+
+    Prepared datasets share one sample rate and PCM format, so the size is
+    proportional to duration and a stat is much cheaper than opening each wav.
+    """
+
+    def size(line: str) -> int:
+        try:
+            return os.stat(wavs_dir / line.split("|", 1)[0]).st_size
+        except OSError:
+            return 0
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(size, lines, chunksize=256))
+
+
+def _balanced_shards(lines: list[str], weights: list[int], n: int) -> list[list[str]]:
+    """Longest-processing-time-first partitioning of lines into n shards.
+
+    Each line, longest first, goes to the shard with the smallest total so
+    far. Lines keep their metadata order within a shard.
+    """
+    loads = [(0, shard) for shard in range(n)]
+    assigned: list[list[int]] = [[] for _ in range(n)]
+    for i in sorted(range(len(lines)), key=weights.__getitem__, reverse=True):
+        load, shard = heapq.heappop(loads)
+        assigned[shard].append(i)
+        heapq.heappush(loads, (load + weights[i], shard))
+    return [[lines[i] for i in sorted(idxs)] for idxs in assigned]
 
 
 def _make_shard_dataset(
@@ -67,22 +99,8 @@ def _make_shard_dataset(
     # Copy config.json
     shutil.copy2(dataset_dir / "config.json", shard_dir / "config.json")
 
-    # Symlink wavs
-    (shard_dir / "wavs").mkdir(parents=True, exist_ok=True)
-    src_wavs = dataset_dir / "wavs"
-    if not src_wavs.is_dir():
-        raise FileNotFoundError(f"Missing wavs/: {src_wavs}")
-
-    for line in metadata_lines:
-        wav_name = line.split("|", 1)[0]
-        src = src_wavs / wav_name
-        dst = shard_dir / "wavs" / wav_name
-        if not src.is_file():
-            # If file is missing, validator should catch; but we want this explicit.
-            raise FileNotFoundError(f"Missing wav referenced by metadata: {src}")
-        dst.symlink_to(src)
-
-    # Write shard metadata
+    # Write shard metadata (wavs are read in place, missing ones are
+    # reported by the validator)
     (shard_dir / "metadata_2col.csv").write_text(
         "\n".join(metadata_lines) + ("\n" if metadata_lines else ""),
         encoding="utf-8",
@@ -91,11 +109,14 @@ def _make_shard_dataset(
 
 def _run_validator(
     *,
-    venv_python: Path,
+    python: str,
     validator_script: Path,
     dataset_dir: Path,
+    wavs_dir: Path | None,
     report_dir: Path,
+    whisper_cache: Path,
     gpu: str,
+    device_index: str | None,
     whisper_model: str,
     whisper_device: str,
     require_whisper: bool,
@@ -109,17 +130,21 @@ def _run_validator(
     whisper_compute_type: str,
     whisper_beam_size: int,
     whisper_vad_filter: bool,
+    workers: int,
 ) -> subprocess.Popen:
     env = os.environ.copy()
     env["CUDA_VISIBLE_DEVICES"] = gpu
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
 
     cmd = [
-        str(venv_python),
+        python,
         str(validator_script),
         "--dataset",
         str(dataset_dir),
         "--report-dir",
         str(report_dir),
+        "--whisper-cache",
+        str(whisper_cache),
         "--whisper",
         "--whisper-model",
         whisper_model,
@@ -141,7 +166,14 @@ def _run_validator(
         whisper_compute_type,
         "--whisper-beam-size",
         str(whisper_beam_size),
+        "--workers",
+        str(workers),
     ]
+    if wavs_dir is not None:
+        # The shard's metadata covers only part of the shared wavs dir
+        cmd.extend(["--wavs-dir", str(wavs_dir), "--no-extra-wav-check"])
+    if device_index:
+        cmd.extend(["--whisper-device-index", device_index])
     if whisper_language:
         cmd.extend(["--whisper-language", whisper_language])
     if whisper_vad_filter:
@@ -191,11 +223,17 @@ def main() -> int:
         help="Whisper progress detail passed to shard validators.",
     )
     parser.add_argument("--workers-per-gpu", type=int, default=1, help="Number of validator processes per GPU.")
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run a single validator over the whole dataset that loads one faster-whisper replica per GPU "
+        "(--whisper-device-index) instead of one process per shard. Needs the faster-whisper backend.",
+    )
     parser.add_argument("--whisper-backend", choices=["auto", "faster-whisper", "whisper"], default="auto")
     parser.add_argument("--whisper-language", default=None)
     parser.add_argument("--whisper-batch-size", type=int, default=8)
     parser.add_argument("--whisper-num-workers", type=int, default=2)
-    parser.add_argument("--whisper-compute-type", default="float16")
+    parser.add_argument("--whisper-compute-type", default="auto")
     parser.add_argument("--whisper-beam-size", type=int, default=5)
     parser.add_argument("--whisper-vad-filter", action="store_true")
 
@@ -217,35 +255,57 @@ def main() -> int:
         else (dataset_dir / "reports" / f"validation_whisper_sharded_{ts}")
     )
 
-    # Resolve paths to validator + venv python relative to this repo.
+    # Resolve validator relative to this repo; workers reuse the running interpreter.
     repo_root = Path(__file__).resolve().parents[1]
-    venv_python = repo_root / ".venv" / "bin" / "python"
+    python = pick_python()
     validator_script = repo_root / "script" / "validate_dataset_full.py"
 
-    lines = _read_metadata_lines(metadata_path)
-    total_workers = max(1, len(gpus) * max(1, args.workers_per_gpu))
-    shards = _round_robin(lines, total_workers)
+    wavs_dir = dataset_dir / "wavs"
+    if not wavs_dir.is_dir():
+        raise SystemExit(f"Missing wavs/: {wavs_dir}")
 
     shard_root = report_dir / "shards"
     shard_reports_root = report_dir / "shard_reports"
     shard_root.mkdir(parents=True, exist_ok=True)
     shard_reports_root.mkdir(parents=True, exist_ok=True)
 
+    # (shard dataset dir, wavs dir override, CUDA_VISIBLE_DEVICES, device index)
+    jobs: list[tuple[Path, Path | None, str, str | None]] = []
+    if args.in_process:
+        # One process sees every GPU and validates the dataset in place, so
+        # the model loads once per GPU and nothing is sharded on disk.
+        jobs.append((dataset_dir, None, ",".join(gpus), ",".join(str(i) for i in range(len(gpus)))))
+    else:
+        lines = _read_metadata_lines(metadata_path)
+        total_workers = max(1, len(gpus) * max(1, args.workers_per_gpu))
+        # Balance shards by audio length so no GPU idles while another finishes
+        # a run of long clips.
+        shards = _balanced_shards(lines, _wav_weights(lines, wavs_dir), total_workers)
+        for idx, shard_lines in enumerate(shards):
+            shard_dataset_dir = shard_root / f"dataset_shard_{idx}"
+            _make_shard_dataset(dataset_dir=dataset_dir, shard_dir=shard_dataset_dir, metadata_lines=shard_lines)
+            jobs.append((shard_dataset_dir, wavs_dir, gpus[idx % len(gpus)], None))
+
+    # The validator defaults to one check process per CPU; split the CPUs
+    # between shards instead of oversubscribing them next to the GPU feeders.
+    workers = max(1, (os.cpu_count() or 1) // len(jobs))
+
     procs: list[subprocess.Popen] = []
     shard_results: list[ShardResult] = []
 
-    for idx in range(len(shards)):
-        gpu = gpus[idx % len(gpus)]
-        shard_dataset_dir = shard_root / f"dataset_shard_{idx}"
-        _make_shard_dataset(dataset_dir=dataset_dir, shard_dir=shard_dataset_dir, metadata_lines=shards[idx])
-
+    for idx, (job_dataset_dir, job_wavs_dir, gpu, device_index) in enumerate(jobs):
         shard_report_dir = shard_reports_root / f"shard_{idx}"
         proc = _run_validator(
-            venv_python=venv_python,
+            python=python,
             validator_script=validator_script,
-            dataset_dir=shard_dataset_dir,
+            dataset_dir=job_dataset_dir,
+            wavs_dir=job_wavs_dir,
             report_dir=shard_report_dir,
+            # Shared by all shards and kept across runs (per-run report dirs
+            # would never hit).
+            whisper_cache=dataset_dir / "reports" / ".whisper_cache.sqlite",
             gpu=gpu,
+            device_index=device_index,
             whisper_model=args.whisper_model,
             whisper_device=args.whisper_device,
             require_whisper=args.require_whisper,
@@ -259,6 +319,7 @@ def main() -> int:
             whisper_compute_type=args.whisper_compute_type,
             whisper_beam_size=args.whisper_beam_size,
             whisper_vad_filter=args.whisper_vad_filter,
+            workers=workers,
         )
         procs.append(proc)
 
@@ -296,6 +357,7 @@ def main() -> int:
         f.write(f"progress_every={args.progress_every}\n")
         f.write(f"progress_mode={args.progress_mode}\n")
         f.write(f"workers_per_gpu={args.workers_per_gpu}\n")
+        f.write(f"in_process={bool(args.in_process)}\n")
         f.write(f"whisper_backend={args.whisper_backend}\n")
         f.write(f"whisper_language={args.whisper_language}\n")
         f.write(f"whisper_batch_size={args.whisper_batch_size}\n")
@@ -10,7 +10,7 @@ from .vits.lightning import VitsModel
 
 # S3 integration
 try:
-    from .s3_callbacks import S3CheckpointCallback, S3LogsCallback
+    from .s3_callbacks import S3CheckpointCallback, S3LogsCallback, S3UploadCheckpointIO
     S3_AVAILABLE = True
 except ImportError:
     S3_AVAILABLE = False
@@ -33,6 +33,27 @@ class SaveOnInterrupt(Callback):
         trainer.save_checkpoint(ckpt_path)
 
 
+class TorchCompile(Callback):
+    """Компилирует декодер генератора и дискриминатор через torch.compile.
+
+    Компилируются только части с фиксированным размером входа (срезы
+    segment_size), модули компилируются на месте, поэтому ключи state_dict
+    и чекпоинты не меняются.
+    """
+
+    def __init__(self, mode: str = "default") -> None:
+        self.mode = mode
+
+    def setup(self, trainer, pl_module, stage: str) -> None:  # type: ignore[override]
+        if stage != "fit":
+            return
+        if not hasattr(torch.nn.Module, "compile"):
+            _LOGGER.warning("torch.compile in place needs torch>=2.2, skipping")
+            return
+        pl_module.model_g.dec.compile(mode=self.mode)
+        pl_module.model_d.compile(mode=self.mode)
+
+
 class VitsLightningCLI(LightningCLI):
     def add_arguments_to_parser(self, parser):
         parser.link_arguments("data.batch_size", "model.batch_size")
@@ -60,12 +81,37 @@ class VitsLightningCLI(LightningCLI):
         )
         kwargs["callbacks"].append(checkpoint_callback)
         kwargs["callbacks"].append(SaveOnInterrupt())
-        
+
+        # PIPER_TORCH_COMPILE=1 (или режим: default/reduce-overhead/max-autotune)
+        compile_mode = os.getenv("PIPER_TORCH_COMPILE", "0")
+        if compile_mode not in ("", "0"):
+            if compile_mode == "1":
+                compile_mode = "default"
+            _LOGGER.info("torch.compile enabled (mode=%s)", compile_mode)
+            kwargs["callbacks"].append(TorchCompile(mode=compile_mode))
+
         # Add S3 sync callbacks if enabled
+        checkpoint_io = None
         if S3_AVAILABLE and os.getenv("ENABLE_S3_SYNC", "0") == "1":
             _LOGGER.info("S3 sync enabled, adding S3 callbacks")
-            kwargs["callbacks"].append(S3CheckpointCallback(upload_on_save=True))
+            s3_checkpoint_callback = S3CheckpointCallback(upload_on_save=True)
+            kwargs["callbacks"].append(s3_checkpoint_callback)
             kwargs["callbacks"].append(S3LogsCallback(sync_every_n_epochs=10))
+            # Uploads are started by the checkpoint writer once the file is on disk
+            checkpoint_io = S3UploadCheckpointIO(s3_checkpoint_callback)
+
+        # PIPER_ASYNC_CHECKPOINT=1: write checkpoints in a background thread
+        if os.getenv("PIPER_ASYNC_CHECKPOINT", "0") == "1":
+            from lightning.pytorch.plugins import AsyncCheckpointIO
+
+            _LOGGER.info("Async checkpoint saving enabled")
+            checkpoint_io = AsyncCheckpointIO(checkpoint_io)
+
+        if checkpoint_io is not None:
+            plugins = kwargs.get("plugins") or []
+            if not isinstance(plugins, list):
+                plugins = [plugins]
+            kwargs["plugins"] = [*plugins, checkpoint_io]
         
         return super().instantiate_trainer(**kwargs)
 
@@ -74,6 +120,7 @@ def main():
     logging.basicConfig(level=logging.INFO)
     torch.backends.cuda.matmul.allow_tf32 = True
     torch.backends.cudnn.allow_tf32 = True
+    torch.set_float32_matmul_precision("high")
     torch.backends.cudnn.deterministic = False
     _cli = VitsLightningCLI(  # noqa: ignore=F841
         VitsModel, VitsDataModule, trainer_defaults={"max_epochs": -1}
@@ -25,6 +25,12 @@ def main() -> None:
         "--output-file", required=True, help="Path to output file (.onnx)"
     )
 
+    parser.add_argument(
+        "--batch-scales",
+        action="store_true",
+        help="Take scales per batch row ([batch, 3]) and add an output_lengths output"
+        " (for batched sweeps; not loadable by the Piper runtime)",
+    )
     parser.add_argument(
         "--debug", action="store_true", help="Print DEBUG messages to the console"
     )
@@ -54,18 +60,28 @@ def main() -> None:
     with torch.no_grad():
         model_g.dec.remove_weight_norm()
 
+    hop_length = model.hparams.hop_length
+
     def infer_forward(text, text_lengths, scales, sid=None):
+        if args.batch_scales:
+            # [batch, 3] -> [batch, 1, 1] each, broadcast over channels/time
+            scales = scales.unsqueeze(-1).unsqueeze(-1).transpose(0, 1)
         noise_scale = scales[0]
         length_scale = scales[1]
         noise_scale_w = scales[2]
-        audio = model_g.infer(
+        audio, _attn, y_mask, _ = model_g.infer(
             text,
             text_lengths,
             noise_scale=noise_scale,
             length_scale=length_scale,
             noise_scale_w=noise_scale_w,
             sid=sid,
-        )[0].unsqueeze(1)
+        )
+        audio = audio.unsqueeze(1)
+
+        if args.batch_scales:
+            audio_lengths = y_mask.sum([1, 2]).long() * hop_length
+            return audio, audio_lengths
 
         return audio
 
@@ -86,6 +102,18 @@ def main() -> None:
 
     # noise, length, noise_w
     scales = torch.FloatTensor([0.667, 1.0, 0.8])
+    output_names = ["output"]
+    dynamic_axes = {
+        "input": {0: "batch_size", 1: "phonemes"},
+        "input_lengths": {0: "batch_size"},
+        "output": {0: "batch_size", 2: "time"},
+    }
+    if args.batch_scales:
+        scales = scales.unsqueeze(0)
+        output_names.append("output_lengths")
+        dynamic_axes["scales"] = {0: "batch_size"}
+        dynamic_axes["output_lengths"] = {0: "batch_size"}
+
     dummy_input = (sequences, sequence_lengths, scales, sid)
 
     # Export using legacy exporter to avoid torch.export symbolic guards
@@ -96,12 +124,8 @@ def main() -> None:
         verbose=False,
         opset_version=OPSET_VERSION,
         input_names=["input", "input_lengths", "scales", "sid"],
-        output_names=["output"],
-        dynamic_axes={
-            "input": {0: "batch_size", 1: "phonemes"},
-            "input_lengths": {0: "batch_size"},
-            "output": {0: "batch_size", 2: "time"},
-        },
+        output_names=output_names,
+        dynamic_axes=dynamic_axes,
     )
     _LOGGER.info("Exported model to %s", output_path)
 
@@ -2,12 +2,33 @@
 
 Automatically uploads checkpoints to S3-compatible storage (Timeweb Cloud).
 """
+import hashlib
+import importlib.util
 import os
 import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
 from lightning.pytorch.callbacks import Callback
+from lightning.pytorch.plugins.io.wrapper import _WrappingCheckpointIO
+
+
+def _fingerprint(ckpt_path: str, block: int = 1 << 20) -> tuple:
+    """Cheap content fingerprint: size plus a hash of the first and last block.
+
+    The pickled checkpoint dict (epoch, global_step, callback state) is
+    stored first in the file, so any new save changes the head.
+    """
+    size = os.stat(ckpt_path).st_size
+    digest = hashlib.blake2b(digest_size=16)
+    with open(ckpt_path, "rb") as ckpt_file:
+        digest.update(ckpt_file.read(block))
+        if size > block:
+            ckpt_file.seek(max(block, size - block))
+            digest.update(ckpt_file.read())
+    return size, digest.hexdigest()
 
 
 class S3CheckpointCallback(Callback):
@@ -18,51 +39,164 @@ class S3CheckpointCallback(Callback):
         s3_sync_script: str = "script/s3_sync.sh",
         upload_on_train_epoch_end: bool = False,
         upload_on_save: bool = True,
+        use_boto3: Optional[bool] = None,
     ):
         """
         Args:
             s3_sync_script: Path to s3_sync.sh script
             upload_on_train_epoch_end: Upload after each epoch (can be slow)
             upload_on_save: Upload when ModelCheckpoint saves (recommended)
+            use_boto3: Parallel multipart upload via boto3 instead of the
+                script (default: PIPER_S3_USE_BOTO3=1)
         """
         super().__init__()
         self.s3_sync_script = s3_sync_script
         self.upload_on_train_epoch_end = upload_on_train_epoch_end
         self.upload_on_save = upload_on_save
-        self._last_uploaded = None
+        if use_boto3 is None:
+            use_boto3 = os.getenv("PIPER_S3_USE_BOTO3", "0") == "1"
+        if use_boto3 and importlib.util.find_spec("boto3") is None:
+            print("⚠️  boto3 not installed, falling back to s3_sync.sh")
+            use_boto3 = False
+        self.use_boto3 = use_boto3
+        self._s3_client = None
+        # Uploads run in the background, one at a time, so the trainer
+        # does not wait for S3. With s3_sync.sh the worker thread only
+        # waits on the child process and does not compete for the GIL.
+        # The boto3 path uploads in-process: its transfer threads release
+        # the GIL on socket and file I/O, but request signing and part
+        # bookkeeping still take some GIL time from the trainer.
+        # Saves that arrive during an upload are coalesced per destination
+        # (file name): only the newest save of each file is uploaded, so a
+        # queued best checkpoint is not dropped by the next last.ckpt.
+        # _lock guards the fields below: they are touched by the trainer
+        # thread, the AsyncCheckpointIO thread and the upload worker.
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._uploading = False
+        self._queued: dict[str, tuple[str, tuple]] = {}
+        self._last_uploaded: dict[str, tuple] = {}
+        self._trainer = None
         
     def _upload_checkpoint(self, ckpt_path: str) -> None:
-        """Upload checkpoint to S3 using s3_sync.sh script."""
+        """Queue checkpoint upload to S3 using s3_sync.sh script."""
         if not Path(ckpt_path).exists():
             print(f"⚠️  Checkpoint not found, skipping upload: {ckpt_path}")
             return
             
-        if ckpt_path == self._last_uploaded:
-            print(f"ℹ️  Already uploaded: {Path(ckpt_path).name}")
-            return
-            
+        # last.ckpt keeps its name across saves, so compare content as well
+        name = Path(ckpt_path).name
+        uploaded_key = _fingerprint(ckpt_path)
+        
+        with self._lock:
+            if self._executor is None:
+                print(f"⚠️  Uploader not running, skipping upload: {name}")
+                return
+            if self._last_uploaded.get(name) == uploaded_key:
+                print(f"ℹ️  Already uploaded: {name}")
+                return
+            self._last_uploaded[name] = uploaded_key
+            if self._uploading:
+                if name in self._queued:
+                    print(f"ℹ️  Skipping superseded upload: {name}")
+                self._queued[name] = (ckpt_path, uploaded_key)
+                return
+            self._uploading = True
+            self._pending = self._executor.submit(
+                self._upload_worker, ckpt_path, uploaded_key
+            )
+    
+    def _upload_worker(self, ckpt_path: str, uploaded_key: tuple) -> None:
+        while True:
+            name = Path(ckpt_path).name
+            uploaded = self._run_upload(ckpt_path)
+            with self._lock:
+                # A newer save of the same file may have been queued meanwhile
+                if not uploaded and self._last_uploaded.get(name) == uploaded_key:
+                    del self._last_uploaded[name]
+                if not self._queued:
+                    self._uploading = False
+                    return
+                # Oldest destination first
+                name = next(iter(self._queued))
+                ckpt_path, uploaded_key = self._queued.pop(name)
+    
+    def _run_upload(self, ckpt_path: str) -> bool:
         try:
             print(f"📤 Uploading checkpoint to S3: {Path(ckpt_path).name}")
-            subprocess.run(
-                [self.s3_sync_script, "upload-checkpoint", ckpt_path],
-                check=True,
-                capture_output=False,
-            )
-            self._last_uploaded = ckpt_path
+            if self.use_boto3:
+                self._upload_checkpoint_boto3(ckpt_path)
+            else:
+                subprocess.run(
+                    [self.s3_sync_script, "upload-checkpoint", ckpt_path],
+                    check=True,
+                    capture_output=False,
+                )
             print(f"✓ Uploaded: {Path(ckpt_path).name}")
-        except subprocess.CalledProcessError as e:
+            return True
+        except Exception as e:
             print(f"❌ Failed to upload checkpoint: {e}")
+            return False
+    
+    def _upload_checkpoint_boto3(self, ckpt_path: str) -> None:
+        """Multipart upload with parts sent over parallel connections.
+
+        Uses the same environment as s3_sync.sh. With boto3[crt] installed
+        the AWS Common Runtime transfer client is used automatically.
+        """
+        from boto3.s3.transfer import TransferConfig
+
+        if self._s3_client is None:
+            import boto3
+            from botocore.config import Config
+
+            self._s3_client = boto3.client(
+                "s3",
+                endpoint_url=os.environ["AWS_ENDPOINT_URL"],
+                region_name=os.getenv("AWS_DEFAULT_REGION", "ru-1-hot"),
+                config=Config(
+                    retries={"max_attempts": 10, "mode": "standard"},
+                    max_pool_connections=32,
+                ),
+            )
+
+        config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=16 * 1024 * 1024,
+            max_concurrency=int(os.getenv("AWS_S3_MAX_CONCURRENCY", "16")),
+            use_threads=True,
+        )
+        key = f"{os.environ['S3_PREFIX']}/checkpoints/{Path(ckpt_path).name}"
+        self._s3_client.upload_file(
+            ckpt_path, os.environ["S3_BUCKET"], key, Config=config
+        )
     
-    def on_save_checkpoint(self, trainer, pl_module, checkpoint) -> None:
-        """Called when Lightning saves a checkpoint."""
-        if not self.upload_on_save:
+    def _wait_pending(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            pending.result()
+    
+    def setup(self, trainer, pl_module, stage) -> None:
+        """Start the upload worker and remember the trainer (fit only)."""
+        if stage != "fit":
             return
-            
-        # Get the path of the checkpoint that was just saved
-        if hasattr(trainer.checkpoint_callback, "last_model_path"):
-            ckpt_path = trainer.checkpoint_callback.last_model_path
-            if ckpt_path:
-                self._upload_checkpoint(ckpt_path)
+        self._trainer = trainer
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="s3-upload"
+                )
+    
+    def _on_checkpoint_written(self, ckpt_path: str) -> None:
+        """Called by S3UploadCheckpointIO once a checkpoint file is on disk."""
+        if not self.upload_on_save or self._trainer is None:
+            return
+        # Upload the latest checkpoint only (not every top-k copy)
+        last_model_path = getattr(self._trainer.checkpoint_callback, "last_model_path", "")
+        if last_model_path and ckpt_path == os.fspath(last_model_path):
+            self._upload_checkpoint(ckpt_path)
     
     def on_train_epoch_end(self, trainer, pl_module) -> None:
         """Called at the end of each training epoch."""
@@ -73,6 +207,41 @@ class S3CheckpointCallback(Callback):
             ckpt_path = trainer.checkpoint_callback.best_model_path
             if ckpt_path:
                 self._upload_checkpoint(ckpt_path)
+    
+    def teardown(self, trainer, pl_module, stage) -> None:
+        """Wait for the last upload so the final checkpoint is not lost.
+
+        Lightning tears down the strategy (and flushes AsyncCheckpointIO)
+        before the callback teardown hooks, so every save has queued its
+        upload by now.
+        """
+        if stage != "fit":
+            return
+        self._trainer = None
+        with self._lock:
+            executor, self._executor = self._executor, None
+        self._wait_pending()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class S3UploadCheckpointIO(_WrappingCheckpointIO):
+    """Checkpoint writer that passes finished files to S3CheckpointCallback.
+
+    on_save_checkpoint runs before the checkpoint is written, and with
+    AsyncCheckpointIO the write finishes later in a background thread.
+    Wrap this plugin in AsyncCheckpointIO (not the other way round) so the
+    upload starts after the write in either case.
+    """
+    
+    def __init__(self, callback: S3CheckpointCallback, checkpoint_io=None):
+        super().__init__(checkpoint_io)
+        self.callback = callback
+    
+    def save_checkpoint(self, checkpoint, path, storage_options=None) -> None:
+        assert self.checkpoint_io is not None
+        self.checkpoint_io.save_checkpoint(checkpoint, path, storage_options=storage_options)
+        self.callback._on_checkpoint_written(os.fspath(path))
 
 
 class S3LogsCallback(Callback):
@@ -91,18 +260,40 @@ class S3LogsCallback(Callback):
         super().__init__()
         self.s3_sync_script = s3_sync_script
         self.sync_every_n_epochs = sync_every_n_epochs
+        self._log_proc: Optional[subprocess.Popen] = None
+        
+    def _sync_running(self) -> bool:
+        """Check the previous sync; report its result once it has finished."""
+        if self._log_proc is None:
+            return False
+        returncode = self._log_proc.poll()
+        if returncode is None:
+            return True
+        if returncode == 0:
+            print("✓ Logs synced to S3")
+        else:
+            print(f"❌ Failed to sync logs: exit code {returncode}")
+        self._log_proc = None
+        return False
         
     def on_train_epoch_end(self, trainer, pl_module) -> None:
-        """Upload logs every N epochs."""
+        """Start a background log upload every N epochs."""
         if trainer.current_epoch % self.sync_every_n_epochs == 0:
+            if self._sync_running():
+                print("ℹ️  Previous log sync still running, skipping")
+                return
             try:
                 print(f"📊 Syncing TensorBoard logs to S3 (epoch {trainer.current_epoch})")
-                subprocess.run(
+                self._log_proc = subprocess.Popen(
                     [self.s3_sync_script, "upload-logs"],
-                    check=True,
-                    capture_output=True,
-                    text=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
                 )
-                print("✓ Logs synced to S3")
-            except subprocess.CalledProcessError as e:
+            except OSError as e:
                 print(f"❌ Failed to sync logs: {e}")
+    
+    def teardown(self, trainer, pl_module, stage) -> None:
+        """Let the last log sync finish."""
+        if self._log_proc is not None:
+            self._log_proc.wait()
+            self._sync_running()
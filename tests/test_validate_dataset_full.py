@@ -0,0 +1,285 @@
+"""Tests for the Whisper paths of script/validate_dataset_full.py.
+
+faster-whisper is replaced by a stub that mimics BatchedInferencePipeline:
+without VAD it refuses audio longer than one window unless clip_timestamps
+are given.
+"""
+
+import importlib.util
+import json
+import struct
+import sys
+import types
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+_SCRIPT = Path(__file__).parent.parent / "script" / "validate_dataset_full.py"
+_SAMPLING_RATE = 16000
+_CHUNK_LENGTH = 30
+_FRAMES_PER_SECOND = 100
+
+
+def _segments(text: str, start: float = 0.0):
+    return iter([types.SimpleNamespace(start=start, text=f" {text}")]), None
+
+
+class _FakeWhisperModel:
+    feature_extractor = types.SimpleNamespace(
+        sampling_rate=_SAMPLING_RATE, chunk_length=_CHUNK_LENGTH
+    )
+    frames_per_second = _FRAMES_PER_SECOND
+
+    def transcribe(self, audio, **kwargs):
+        return _segments(f"plain{len(audio) // _SAMPLING_RATE}")
+
+
+class _FakeBatchedInferencePipeline:
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, batch_size=None, vad_filter=False, clip_timestamps=None, **kwargs):
+        if not vad_filter and not clip_timestamps and len(audio) > _CHUNK_LENGTH * _SAMPLING_RATE:
+            raise RuntimeError("No clip timestamps found.")
+        if clip_timestamps:
+            # One chunk per clip; seek is the chunk offset in frames.
+            segments = []
+            for clip in clip_timestamps:
+                start = _clip_seconds(clip["start"])
+                segments.append(
+                    types.SimpleNamespace(
+                        seek=int(start * _FRAMES_PER_SECOND),
+                        start=round(start, 3),
+                        text=" batched",
+                    )
+                )
+            return iter(segments), None
+        return _segments(f"batched{len(audio) // _SAMPLING_RATE}")
+
+
+def _clip_seconds(value) -> float:
+    version = sys.modules["faster_whisper.version"].__version__
+    return value / _SAMPLING_RATE if version.startswith("1.1.") else value
+
+
+def _decode_audio(path, sampling_rate=_SAMPLING_RATE):
+    # file names encode the duration in seconds: clip_31.wav
+    seconds = int(Path(path).stem.split("_")[1])
+    return np.zeros(seconds * sampling_rate, dtype=np.float32)
+
+
+@pytest.fixture(name="validator")
+def validator_fixture(monkeypatch):
+    faster_whisper = types.ModuleType("faster_whisper")
+    faster_whisper.WhisperModel = _FakeWhisperModel
+    faster_whisper.BatchedInferencePipeline = _FakeBatchedInferencePipeline
+    faster_whisper.decode_audio = _decode_audio
+    version = types.ModuleType("faster_whisper.version")
+    version.__version__ = "1.2.1"
+    monkeypatch.setitem(sys.modules, "faster_whisper", faster_whisper)
+    monkeypatch.setitem(sys.modules, "faster_whisper.version", version)
+
+    spec = importlib.util.spec_from_file_location("validate_dataset_full", _SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _pipeline():
+    return _FakeBatchedInferencePipeline(model=_FakeWhisperModel())
+
+
+def test_long_clip_without_vad_uses_plain_model(validator) -> None:
+    run = validator.make_whisper_transcriber(
+        "faster-whisper",
+        _pipeline(),
+        device="cpu",
+        language="ru",
+        batch_size=8,
+        beam_size=1,
+        vad_filter=False,
+    )
+    assert run(np.zeros(31 * _SAMPLING_RATE, dtype=np.float32)) == "plain31"
+    assert run(Path("clip_45.wav")) == "plain45"
+    assert run(np.zeros(10 * _SAMPLING_RATE, dtype=np.float32)) == "batched10"
+
+
+def test_batch_with_long_clip(validator) -> None:
+    results = validator.whisper_transcribe_batch(
+        [Path("clip_5.wav"), Path("clip_31.wav"), Path("clip_7.wav")],
+        backend="faster-whisper",
+        model=_pipeline(),
+        device="cpu",
+        language="ru",
+        batch_size=8,
+        beam_size=1,
+        vad_filter=False,
+    )
+    assert results == ["batched", "plain31", "batched"]
+
+
+@pytest.mark.parametrize(
+    ("version", "expected_end"),
+    (("1.1.1", 5 * _SAMPLING_RATE), ("1.2.1", 5.0)),
+)
+def test_clip_timestamp_units(validator, version: str, expected_end) -> None:
+    sys.modules["faster_whisper.version"].__version__ = version
+    pipeline = _pipeline()
+    seen = []
+    transcribe = pipeline.transcribe
+
+    def record(audio, clip_timestamps=None, **kwargs):
+        seen.extend(clip_timestamps)
+        return transcribe(audio, clip_timestamps=clip_timestamps, **kwargs)
+
+    pipeline.transcribe = record
+    audios = [np.zeros(5 * _SAMPLING_RATE, dtype=np.float32)] * 2
+    validator._transcribe_concatenated(
+        pipeline, audios, language="ru", batch_size=8, beam_size=1
+    )
+    assert seen[0]["end"] == expected_end
+
+
+def test_concatenated_segments_map_by_chunk(validator) -> None:
+    pipeline = _pipeline()
+
+    def transcribe(audio, clip_timestamps=None, **kwargs):
+        first, second = clip_timestamps
+        segments = [
+            types.SimpleNamespace(seek=0, start=0.0, text="one"),
+            # hallucinated timestamp past the end of the first clip
+            types.SimpleNamespace(seek=0, start=second["start"] + 0.5, text="two"),
+            types.SimpleNamespace(
+                seek=int(second["start"] * _FRAMES_PER_SECOND), start=second["start"], text="three"
+            ),
+        ]
+        return iter(segments), None
+
+    pipeline.transcribe = transcribe
+    audios = [
+        np.zeros(int(2.3 * _SAMPLING_RATE), dtype=np.float32),
+        np.zeros(4 * _SAMPLING_RATE, dtype=np.float32),
+    ]
+    texts = validator._transcribe_concatenated(
+        pipeline, audios, language="ru", batch_size=8, beam_size=1
+    )
+    assert texts == ["one two", "three"]
+
+
+def _write_wav(path: Path, seconds: float, channels: int = 1, sample_rate: int = 22050) -> None:
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b"\0\0" * channels * int(seconds * sample_rate))
+
+
+def test_report_tsv(validator, tmp_path, monkeypatch) -> None:
+    dataset = tmp_path / "dataset"
+    wavs = dataset / "wavs"
+    wavs.mkdir(parents=True)
+    (dataset / "config.json").write_text(json.dumps({"audio": {"sample_rate": 22050}}))
+    (dataset / "metadata_2col.csv").write_text(
+        "a.wav|Ок\n"
+        'b.wav|He said "yes"\tand left\n'
+        "c.wav|Нормальная фраза номер один.\n",
+        encoding="utf-8",
+    )
+    _write_wav(wavs / "a.wav", 1.0, channels=2)
+    _write_wav(wavs / "b.wav", 1.0)
+    _write_wav(wavs / "c.wav", 1.0)
+    _write_wav(wavs / "d.wav", 1.0)
+
+    report_dir = tmp_path / "report"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "validate_dataset_full.py",
+            "--dataset",
+            str(dataset),
+            "--report-dir",
+            str(report_dir),
+            "--workers",
+            "1",
+            "--progress-mode",
+            "none",
+        ],
+    )
+    with pytest.raises(SystemExit):
+        validator.main()
+
+    (tsv_path,) = report_dir.glob("validation_*.tsv")
+    assert tsv_path.read_text(encoding="utf-8").splitlines() == [
+        "row\twav\ttext\tissue",
+        "1\ta.wav\tОк\ttoo_short_text;not_mono",
+        '2\tb.wav\t"He said ""yes""\tand left"\tlow_cyrillic_ratio',
+        "-\td.wav\t\textra_wav",
+    ]
+
+
+def _riff(*chunks: tuple[bytes, bytes]) -> bytes:
+    body = b"WAVE"
+    for chunk_id, data in chunks:
+        body += chunk_id + struct.pack("<I", len(data)) + data + b"\0" * (len(data) & 1)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def _pcm16_fmt(channels: int, sample_rate: int) -> bytes:
+    block_align = 2 * channels
+    return struct.pack("<HHIIHH", 1, channels, sample_rate, sample_rate * block_align, block_align, 16)
+
+
+def _wave_info(path: Path) -> tuple:
+    with wave.open(str(path), "rb") as wav_file:
+        frames = len(wav_file.readframes(1 << 30)) // (wav_file.getsampwidth() * wav_file.getnchannels())
+        return wav_file.getframerate(), wav_file.getnchannels(), "PCM_16", frames
+
+
+def test_fast_wav_info_list_chunk_before_data(validator, tmp_path) -> None:
+    path = tmp_path / "list.wav"
+    path.write_bytes(
+        _riff(
+            (b"fmt ", _pcm16_fmt(2, 22050)),
+            # odd size: the chunk is padded to an even length
+            (b"LIST", b"INFOISFT\x05\0\0\0Lavf\0"),
+            (b"data", b"\1\0" * 2 * 1000),
+        )
+    )
+    assert validator._fast_wav_info(path) == _wave_info(path) == (22050, 2, "PCM_16", 1000)
+
+
+def test_fast_wav_info_truncated(validator, tmp_path) -> None:
+    path = tmp_path / "truncated.wav"
+    data = _riff((b"fmt ", _pcm16_fmt(1, 16000)), (b"data", b"\0\0" * 1000))
+    # data chunk declares 1000 frames, the file only holds 600
+    path.write_bytes(data[: len(data) - 800])
+    assert validator._fast_wav_info(path) == _wave_info(path) == (16000, 1, "PCM_16", 600)
+
+    path.write_bytes(data[:30])  # cut inside the fmt chunk
+    assert validator._fast_wav_info(path) is None
+
+
+def test_fast_wav_info_extensible(validator, tmp_path) -> None:
+    path = tmp_path / "extensible.wav"
+    fmt = struct.pack("<HHIIHH", 0xFFFE, 1, 16000, 32000, 2, 16)
+    # cbSize, valid bits, channel mask, KSDATAFORMAT_SUBTYPE_PCM
+    fmt += struct.pack("<HHI", 22, 16, 4)
+    fmt += bytes.fromhex("0100000000001000800000aa00389b71")
+    path.write_bytes(_riff((b"fmt ", fmt), (b"data", b"\0\0" * 16000)))
+    # Left to soundfile
+    assert validator._fast_wav_info(path) is None
+
+    soundfile = pytest.importorskip("soundfile")
+    info = soundfile.info(str(path))
+    assert validator.check_audio_info(path, 16000) == {
+        "samplerate": info.samplerate,
+        "channels": info.channels,
+        "subtype": info.subtype,
+        "duration": info.frames / info.samplerate,
+        "frames": info.frames,
+        "issues": [],
+    }
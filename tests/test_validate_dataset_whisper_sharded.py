@@ -0,0 +1,42 @@
+"""Tests for the shard split in script/validate_dataset_whisper_sharded.py."""
+
+import importlib.util
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+_SCRIPT_DIR = Path(__file__).parent.parent / "script"
+
+
+@pytest.fixture(name="sharded")
+def sharded_fixture(monkeypatch):
+    monkeypatch.syspath_prepend(str(_SCRIPT_DIR))
+    spec = importlib.util.spec_from_file_location(
+        "validate_dataset_whisper_sharded", _SCRIPT_DIR / "validate_dataset_whisper_sharded.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("n", (1, 3, 8))
+def test_balanced_shards(sharded, n: int) -> None:
+    rng = random.Random(1234)
+    lines = [f"u{i:04d}.wav|text {i}" for i in range(200)]
+    # ties (equal sizes) and missing wavs (0) included
+    weights = [rng.choice((0, 44, 44, 88_000, rng.randrange(1, 500_000))) for _ in lines]
+
+    shards = sharded._balanced_shards(lines, weights, n)
+
+    assert len(shards) == n
+    assert sorted(line for shard in shards for line in shard) == lines
+    for shard in shards:
+        assert shard == sorted(shard, key=lines.index)
+    assert sharded._balanced_shards(lines, weights, n) == shards
+
+    weight_by_line = dict(zip(lines, weights))
+    loads = [sum(weight_by_line[line] for line in shard) for shard in shards]
+    assert max(loads) - min(loads) <= max(weights)
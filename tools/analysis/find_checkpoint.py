@@ -11,10 +11,14 @@ lightning_logs = Path("/workspace/piper1-gpl/lightning_logs")
 for version_dir in sorted(lightning_logs.glob("version_*")):
     ckpt_dir = version_dir / "checkpoints"
     if ckpt_dir.exists():
-        ckpts = list(ckpt_dir.glob("*.ckpt"))
+        with os.scandir(ckpt_dir) as it:
+            ckpts = sorted(
+                (entry for entry in it if entry.name.endswith(".ckpt")),
+                key=lambda entry: entry.name,
+            )
         if ckpts:
             print(f"📁 {version_dir.name}/checkpoints/")
-            for ckpt in sorted(ckpts):
+            for ckpt in ckpts:
                 size_mb = ckpt.stat().st_size / (1024 * 1024)
                 print(f"  • {ckpt.name}")
                 print(f"    Размер: {size_mb:.1f} MB")
@@ -22,5 +26,5 @@ for version_dir in sorted(lightning_logs.glob("version_*")):
                 # Ищем эпоху 749
                 if "749" in ckpt.name or "epoch=749" in ckpt.name:
                     print(f"    ⭐ НАЙДЕН ЧЕКПОИНТ ЭПОХИ 749!")
-                    print(f"    Путь: {ckpt}")
+                    print(f"    Путь: {ckpt.path}")
             print()
@@ -20,14 +20,14 @@ except ImportError:
 # Добавляем путь к piper
 sys.path.insert(0, "/workspace/piper1-gpl/src")
 
-from piper.phonemize_espeak import EspeakPhonemizer
+from phonemizer_utils import get_phonemizer
 
 def phonemize_text(text: str, voice: str = "ru", phoneme_id_map: dict = None) -> list[int]:
     """Преобразование текста в ID фонем"""
     if phoneme_id_map is None:
         raise ValueError("phoneme_id_map required")
     
-    phonemizer = EspeakPhonemizer()
+    phonemizer = get_phonemizer()
     phonemes_list = phonemizer.phonemize(voice, text)
     
     # Объединяем все фонемы в одну последовательность
@@ -94,10 +94,11 @@ def generate_audio(text: str, model_path: str, config_path: str, output_path: st
         wav_file.setsampwidth(2)  # 16-bit
         wav_file.setframerate(sample_rate)
         
-        # Нормализация и конвертация в int16
-        audio = np.clip(audio, -1.0, 1.0)
-        audio_int16 = (audio * 32767).astype(np.int16)
-        wav_file.writeframes(audio_int16.tobytes())
+        # Нормализация и конвертация в int16 кусками по 64K сэмплов
+        for start in range(0, len(audio), 65536):
+            chunk = audio[start : start + 65536] * 32767.0
+            np.clip(chunk, -32767.0, 32767.0, out=chunk)
+            wav_file.writeframesraw(chunk.astype(np.int16))
     
     duration = len(audio) / sample_rate
     print(f"✅ Готово! Длительность: {duration:.2f} сек")
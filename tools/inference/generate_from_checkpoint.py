@@ -3,20 +3,35 @@
 
 import sys
 import json
+import pickle
+import wave
 import torch
 import numpy as np
 from pathlib import Path
-from scipy.io import wavfile
 
 sys.path.insert(0, "/workspace/piper1-gpl/src")
 
 from piper.train.vits.lightning import VitsModel
-from piper.phonemize_espeak import EspeakPhonemizer
+from phonemizer_utils import get_phonemizer
+
+def _torch_load(ckpt_path: str, weights_only: bool):
+    """torch.load с mmap, если он поддерживается (torch>=2.1)"""
+    # mmap: читаются с диска только тензоры state_dict, состояние
+    # оптимизатора/планировщика в память не загружается
+    try:
+        return torch.load(ckpt_path, map_location='cpu', mmap=True, weights_only=weights_only)
+    except TypeError:
+        # torch 2.0: аргумента mmap нет, обычная загрузка
+        return torch.load(ckpt_path, map_location='cpu', weights_only=weights_only)
 
 def load_checkpoint(ckpt_path: str, config_path: str):
     """Загрузка модели из checkpoint"""
     print(f"⏳ Загрузка checkpoint: {ckpt_path}")
-    checkpoint = torch.load(ckpt_path, map_location='cpu')
+    try:
+        checkpoint = _torch_load(ckpt_path, weights_only=True)
+    except pickle.UnpicklingError:
+        # в старых чекпоинтах бывают объекты вне allowlist weights_only
+        checkpoint = _torch_load(ckpt_path, weights_only=False)
     
     # Загрузка конфига из JSON
     with open(config_path, 'r') as f:
@@ -36,7 +51,7 @@ def phonemize_text(text: str, voice: str = "ru", phoneme_id_map: dict = None) ->
     if phoneme_id_map is None:
         raise ValueError("phoneme_id_map required")
     
-    phonemizer = EspeakPhonemizer()
+    phonemizer = get_phonemizer()
     phonemes_list = phonemizer.phonemize(voice, text)
     
     # Объединяем все фонемы
@@ -44,16 +59,13 @@ def phonemize_text(text: str, voice: str = "ru", phoneme_id_map: dict = None) ->
     for sent_phonemes in phonemes_list:
         phonemes.extend(sent_phonemes)
     
-    # Преобразуем в ID
-    phoneme_ids = []
-    for phoneme in phonemes:
-        if phoneme in phoneme_id_map:
-            phoneme_ids.extend(phoneme_id_map[phoneme])
-        else:
-            print(f"⚠️ Неизвестная фонема: '{phoneme}'")
-            phoneme_ids.append(0)
+    # Преобразуем в ID (неизвестные фонемы -> 0, предупреждение один раз на фонему)
+    for phoneme in sorted(set(phonemes).difference(phoneme_id_map)):
+        print(f"⚠️ Неизвестная фонема: '{phoneme}'")
     
-    return phoneme_ids
+    id_map_get = phoneme_id_map.get
+    unknown_ids = [0]
+    return [i for phoneme in phonemes for i in id_map_get(phoneme, unknown_ids)]
 
 def generate_audio(text: str, model, config: dict, output_path: str):
     """Генерация аудио из текста"""
@@ -80,17 +92,55 @@ def generate_audio(text: str, model, config: dict, output_path: str):
         )[0]
     
     # Сохранение
-    audio_np = audio.squeeze().cpu().numpy()
-    audio_np = np.clip(audio_np, -1.0, 1.0)
-    audio_int16 = (audio_np * 32767).astype(np.int16)
-    
+    save_audio(audio.squeeze().cpu().numpy(), config, output_path)
+
+def save_audio(audio_np: np.ndarray, config: dict, output_path: str):
+    """Сохранение float-аудио в 16-bit WAV"""
     sample_rate = config.get('audio', {}).get('sample_rate', 22050)
-    wavfile.write(output_path, sample_rate, audio_int16)
+    with wave.open(output_path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        # Конвертация в int16 кусками по 64K сэмплов
+        for start in range(0, len(audio_np), 65536):
+            chunk = audio_np[start : start + 65536] * 32767.0
+            np.clip(chunk, -32767.0, 32767.0, out=chunk)
+            wav_file.writeframesraw(chunk.astype(np.int16))
     
     duration = len(audio_np) / sample_rate
     print(f"💾 Сохранено: {output_path}")
     print(f"✅ Длительность: {duration:.2f} сек\n")
 
+def generate_batch(items: list[tuple[str, str]], model, config: dict):
+    """Генерация нескольких фраз одним батчем (items: пары текст, путь)"""
+    phoneme_id_map = config['phoneme_id_map']
+    ids_list = [
+        phonemize_text(text, voice="ru", phoneme_id_map=phoneme_id_map)
+        for text, _ in items
+    ]
+    
+    # Паддинг до самой длинной фразы; маски VITS отсекают хвост
+    phoneme_lengths = torch.LongTensor([len(ids) for ids in ids_list])
+    phoneme_ids_tensor = torch.zeros(len(ids_list), int(phoneme_lengths.max()), dtype=torch.long)
+    for row, ids in enumerate(ids_list):
+        phoneme_ids_tensor[row, : len(ids)] = torch.LongTensor(ids)
+    
+    print(f"🎤 Генерация батча из {len(items)} фраз...")
+    with torch.no_grad():
+        audio, _attn, y_mask, _ = model.model_g.infer(
+            phoneme_ids_tensor,
+            phoneme_lengths,
+            noise_scale=0.667,
+            length_scale=1.0,
+            noise_scale_w=0.8,
+        )
+    audio_lengths = (y_mask.sum([1, 2]).long() * model.hparams.hop_length).tolist()
+    audio = audio.squeeze(1).cpu().numpy()
+    
+    for row, (text, output_path) in enumerate(items):
+        print(f"📝 Текст: {text}")
+        save_audio(audio[row, : audio_lengths[row]], config, output_path)
+
 if __name__ == "__main__":
     # Пути
     ckpt_path = "/workspace/piper1-gpl/lightning_logs/version_15/checkpoints/epoch=851-step=370000-val_loss=27.6856.ckpt"
@@ -114,13 +164,24 @@ if __name__ == "__main__":
     else:
         phrases = ["Привет! Это тест модели epoch 851."]
     
-    # Генерация
-    for i, phrase in enumerate(phrases, 1):
-        output_file = output_dir / f"test_851_{i:02d}.wav"
+    # Генерация батчами; фразы близкой длины вместе, чтобы меньше паддинга
+    batch_size = 8
+    items = [
+        (phrase, str(output_dir / f"test_851_{i:02d}.wav"))
+        for i, phrase in enumerate(phrases, 1)
+    ]
+    items.sort(key=lambda item: len(item[0]))
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
         try:
-            generate_audio(phrase, model, config, str(output_file))
+            generate_batch(batch, model, config)
         except Exception as e:
-            print(f"❌ Ошибка: {e}\n")
-            continue
+            print(f"❌ Ошибка батча: {e}, генерация по одной фразе\n")
+            for phrase, output_file in batch:
+                try:
+                    generate_audio(phrase, model, config, output_file)
+                except Exception as e:
+                    print(f"❌ Ошибка: {e}\n")
+                    continue
     
     print(f"🎉 Готово! Создано {len(list(output_dir.glob('*.wav')))} файлов")
@@ -0,0 +1,106 @@
+"""Shared helpers for the ONNX test scripts (test_onnx_generate, test_onnx_variations)."""
+
+import wave
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+
+from phonemizer_utils import get_phonemizer
+
+try:
+    from piper.phoneme_ids import phonemes_to_ids
+except ImportError:  # run from the repo root without installing piper
+    from src.piper.phoneme_ids import phonemes_to_ids
+
+
+def text_to_ids(text: str, voice: str, phoneme_id_map: dict[str, list[int]]) -> list[int]:
+    """Phonemize text with espeak-ng and convert phonemes to id sequence using model's phoneme map."""
+    phonemizer = get_phonemizer()
+    sentences = phonemizer.phonemize(voice, text)
+    if not sentences:
+        raise SystemExit("Phonemizer returned no phonemes")
+
+    # Flatten sentences; insert a space between sentences to keep pause
+    flat_phonemes: list[str] = []
+    for idx, sentence in enumerate(sentences):
+        flat_phonemes.extend(sentence)
+        if idx < len(sentences) - 1:
+            flat_phonemes.append(" ")
+
+    return phonemes_to_ids(flat_phonemes, phoneme_id_map)
+
+
+def select_providers() -> list:
+    """Prefer CUDA, then OpenVINO, always keeping CPU as the fallback."""
+    available = ort.get_available_providers()
+    providers: list = []
+    if "CUDAExecutionProvider" in available:
+        providers.append(
+            (
+                "CUDAExecutionProvider",
+                {
+                    "device_id": 0,
+                    "arena_extend_strategy": "kNextPowerOfTwo",
+                    # Input length changes per text; EXHAUSTIVE would re-search per shape
+                    "cudnn_conv_algo_search": "HEURISTIC",
+                },
+            )
+        )
+    elif "OpenVINOExecutionProvider" in available:
+        providers.append("OpenVINOExecutionProvider")
+    providers.append("CPUExecutionProvider")
+    return providers
+
+
+def quantized_model_path(model_path: Path) -> Path:
+    """Return MODEL.int8.onnx, creating it (dynamic int8 weights) if missing or stale."""
+    int8_path = model_path.with_suffix(".int8.onnx")
+    if not int8_path.exists() or int8_path.stat().st_mtime < model_path.stat().st_mtime:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"Quantizing {model_path} -> {int8_path}")
+        quantize_dynamic(str(model_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
+
+
+@lru_cache(maxsize=None)
+def load_session(model_path: Path) -> ort.InferenceSession:
+    """Create the ONNX session once per model; graph parsing and kernel setup are slow."""
+    sess_options = ort.SessionOptions()
+    sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    sess = ort.InferenceSession(str(model_path), sess_options, providers=select_providers())
+    print(f"Providers: {', '.join(sess.get_providers())}")
+    return sess
+
+
+def run_inference(sess: ort.InferenceSession, ids: list[int], noise: float, length: float, noise_w: float) -> np.ndarray:
+    """Run ONNX model and return audio as float32 numpy array."""
+    sequences = np.array(ids, dtype=np.int64)[None, :]
+    sequence_lengths = np.array([sequences.shape[1]], dtype=np.int64)
+    scales = np.array([noise, length, noise_w], dtype=np.float32)
+
+    output = sess.run(
+        None,
+        {
+            "input": sequences,
+            "input_lengths": sequence_lengths,
+            "scales": scales,
+        },
+    )[0]
+
+    return np.squeeze(output)
+
+
+def save_wav(path: Path, audio: np.ndarray, sample_rate: int) -> None:
+    """Save mono audio to WAV (16-bit PCM), converting in fixed-size chunks."""
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        # Extra memory is one chunk, not a full-length int16 copy plus bytes
+        for start in range(0, len(audio), 65536):
+            chunk = audio[start : start + 65536] * 32767.0
+            np.clip(chunk, -32767.0, 32767.0, out=chunk)
+            wf.writeframesraw(chunk.astype(np.int16))
@@ -0,0 +1,14 @@
+"""Cached espeak-ng phonemizer shared by the inference scripts (no onnxruntime needed)."""
+
+from functools import lru_cache
+
+try:
+    from piper.phonemize_espeak import EspeakPhonemizer
+except ImportError:  # run from the repo root without installing piper
+    from src.piper.phonemize_espeak import EspeakPhonemizer
+
+
+@lru_cache(maxsize=1)
+def get_phonemizer() -> EspeakPhonemizer:
+    """One instance per process; espeak-ng initialization is not free."""
+    return EspeakPhonemizer()
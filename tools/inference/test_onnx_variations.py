@@ -7,10 +7,14 @@ from pathlib import Path
 
 import numpy as np
 import onnxruntime as ort
-import wave
 
-from src.piper.phoneme_ids import phonemes_to_ids
-from src.piper.phonemize_espeak import EspeakPhonemizer
+from onnx_utils import (
+    load_session,
+    quantized_model_path,
+    run_inference,
+    save_wav,
+    text_to_ids,
+)
 
 
 # Предустановки параметров для тестирования
@@ -26,54 +30,33 @@ PRESETS = {
 }
 
 
-def text_to_ids(text: str, voice: str, phoneme_id_map: dict) -> list[int]:
-    """Phonemize text with espeak-ng and convert phonemes to id sequence."""
-    phonemizer = EspeakPhonemizer()
-    sentences = phonemizer.phonemize(voice, text)
-    if not sentences:
-        raise SystemExit("Phonemizer returned no phonemes")
+def has_batch_scales(sess: ort.InferenceSession) -> bool:
+    """True for models exported with --batch-scales (scales shaped [batch, 3])."""
+    return any(inp.name == "scales" and len(inp.shape) == 2 for inp in sess.get_inputs())
 
-    flat_phonemes: list[str] = []
-    for idx, sentence in enumerate(sentences):
-        flat_phonemes.extend(sentence)
-        if idx < len(sentences) - 1:
-            flat_phonemes.append(" ")
 
-    return phonemes_to_ids(flat_phonemes, phoneme_id_map)
-
-
-def run_inference(
-    model_path: Path, ids: list[int], noise: float, length: float, noise_w: float
-) -> np.ndarray:
-    """Run ONNX model and return audio as float32 numpy array."""
-    sess = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
-
-    sequences = np.array(ids, dtype=np.int64)[None, :]
-    sequence_lengths = np.array([sequences.shape[1]], dtype=np.int64)
-    scales = np.array([noise, length, noise_w], dtype=np.float32)
+def run_inference_batch(
+    sess: ort.InferenceSession, ids: list[int], presets: list[dict]
+) -> list[np.ndarray]:
+    """Run all presets in one forward pass, one batch row per preset."""
+    batch_size = len(presets)
+    sequences = np.tile(np.array(ids, dtype=np.int64), (batch_size, 1))
+    sequence_lengths = np.full(batch_size, sequences.shape[1], dtype=np.int64)
+    scales = np.array(
+        [[p["noise"], p["length"], p["noise_w"]] for p in presets], dtype=np.float32
+    )
 
-    output = sess.run(
+    audio, audio_lengths = sess.run(
         None,
         {
             "input": sequences,
             "input_lengths": sequence_lengths,
             "scales": scales,
         },
-    )[0]
-
-    return np.squeeze(output)
-
+    )[:2]
 
-def save_wav(path: Path, audio: np.ndarray, sample_rate: int) -> None:
-    """Save mono audio to WAV (16-bit PCM)."""
-    audio = np.clip(audio, -1.0, 1.0)
-    audio_int16 = (audio * 32767.0).astype(np.int16)
-
-    with wave.open(str(path), "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        wf.writeframes(audio_int16.tobytes())
+    # Rows are padded to the longest preset; trim each to its own length
+    return [audio[i].reshape(-1)[:n] for i, n in enumerate(audio_lengths)]
 
 
 def main() -> None:
@@ -97,6 +80,11 @@ def main() -> None:
         choices=list(PRESETS.keys()),
         help="Which presets to generate",
     )
+    parser.add_argument(
+        "--int8",
+        action="store_true",
+        help="Use an int8-quantized copy of the model (CPU inference)",
+    )
     args = parser.parse_args()
 
     model_path = Path(args.model)
@@ -128,7 +116,16 @@ def main() -> None:
     print(f"Phoneme IDs count: {len(ids)}")
     print()
 
-    for preset_name in args.presets:
+    if args.int8:
+        model_path = quantized_model_path(model_path)
+    sess = load_session(model_path)
+
+    audios: list[np.ndarray] | None = None
+    if has_batch_scales(sess):
+        print(f"Batched inference: {len(args.presets)} presets in one pass")
+        audios = run_inference_batch(sess, ids, [PRESETS[name] for name in args.presets])
+
+    for preset_idx, preset_name in enumerate(args.presets):
         params = PRESETS[preset_name]
         output_path = output_dir / f"{preset_name}.wav"
 
@@ -137,9 +134,12 @@ def main() -> None:
             f"length={params['length']}, noise_w={params['noise_w']}"
         )
 
-        audio = run_inference(
-            model_path, ids, params["noise"], params["length"], params["noise_w"]
-        )
+        if audios is not None:
+            audio = audios[preset_idx]
+        else:
+            audio = run_inference(
+                sess, ids, params["noise"], params["length"], params["noise_w"]
+            )
         save_wav(output_path, audio, args.sample_rate)
 
         duration_sec = len(audio) / args.sample_rate
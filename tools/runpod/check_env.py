@@ -14,6 +14,16 @@ def find_repo_root() -> Path:
     return here.parent
 
 
+def iter_checkpoints(root):
+    """Yield DirEntry for every *.ckpt under root (single os.scandir sweep)."""
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_checkpoints(entry.path)
+            elif entry.name.endswith(".ckpt"):
+                yield entry
+
+
 print("QUICK ENVIRONMENT CHECK")
 print("="*60)
 
@@ -76,11 +86,17 @@ for path in [p for p in dataset_paths if p]:
 print(f"\nCheckpoints:")
 ckpt_dir = piper_dir / "lightning_logs"
 if ckpt_dir.exists():
-    checkpoints = list(ckpt_dir.rglob("*.ckpt"))
-    print(f"  Found: {len(checkpoints)}")
-    if checkpoints:
-        latest = sorted(checkpoints)[-1]
-        print(f"  Latest: {latest.relative_to(piper_dir)}")
+    found = 0
+    latest = None
+    latest_mtime = 0.0
+    for entry in iter_checkpoints(ckpt_dir):
+        found += 1
+        mtime = entry.stat().st_mtime
+        if latest is None or mtime > latest_mtime:
+            latest, latest_mtime = entry.path, mtime
+    print(f"  Found: {found}")
+    if latest:
+        print(f"  Latest: {Path(latest).relative_to(piper_dir)}")
 else:
     print("  ✗ No lightning_logs")
 